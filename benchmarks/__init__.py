@@ -0,0 +1,5 @@
+from .corpus import generate_corpus
+from .runner import measure, measure_once
+from .suite import run_suite
+
+__all__ = ['generate_corpus', 'run_suite', 'measure', 'measure_once']
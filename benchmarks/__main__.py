@@ -0,0 +1,93 @@
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.suite import run_suite
+from main import __version__
+
+
+def setup_argument_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark extraction, parsing and output paths on a synthetic corpus'
+    )
+
+    parser.add_argument('--count', type=int, default=300, metavar='N',
+                        help='Number of synthetic images to generate (default: 300)')
+    parser.add_argument('--repeat', type=int, default=3, metavar='N',
+                        help='Repetitions of each per-file benchmark (default: 3)')
+    parser.add_argument('--corpus', type=str, metavar='DIR',
+                        help='Directory for the generated corpus (default: temporary, removed afterwards)')
+    parser.add_argument('--output', type=str, default='bench_results.json', metavar='FILE',
+                        help='JSON results file (default: bench_results.json)')
+    parser.add_argument('--compare', type=str, metavar='FILE',
+                        help='Previous JSON results file to compare against')
+
+    return parser
+
+
+def print_results(results, baseline=None):
+    baseline_by_name = {entry['name']: entry for entry in (baseline or {}).get('results', [])}
+
+    print(f"{'Benchmark':36} {'ops/sec':>12} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'vs base':>9}")
+    print("-" * 88)
+
+    for entry in results:
+        p50 = f"{entry['p50_ms']:.3f}" if entry['p50_ms'] is not None else '-'
+        p99 = f"{entry['p99_ms']:.3f}" if entry['p99_ms'] is not None else '-'
+
+        change = ''
+        previous = baseline_by_name.get(entry['name'])
+        if previous and previous['ops_per_sec']:
+            change = f"{entry['ops_per_sec'] / previous['ops_per_sec']:.2f}x"
+
+        print(
+            f"{entry['name']:36} {entry['ops_per_sec']:12.1f} {p50:>9} {p99:>9} "
+            f"{entry['peak_rss_mb']:8.1f} {change:>9}"
+        )
+
+
+def main():
+    args = setup_argument_parser().parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    corpus_dir = Path(args.corpus) if args.corpus else Path(tempfile.mkdtemp(prefix='metadata_bench_'))
+
+    try:
+        print(f"Generating corpus of {args.count} images in {corpus_dir}")
+        corpus = generate_corpus(corpus_dir, count=args.count)
+        results = run_suite(corpus, corpus_dir, repeat=args.repeat)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {
+        'version': __version__,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'corpus': {name: len(paths) for name, paths in corpus.items()},
+        'results': results
+    }
+
+    print()
+    print_results(results, baseline)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
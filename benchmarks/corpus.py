@@ -0,0 +1,118 @@
+import random
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+
+EXIF_SIZES = ['small', 'medium', 'large']
+
+IMAGE_FORMATS = [
+    ('JPEG', '.jpg'),
+    ('PNG', '.png'),
+    ('TIFF', '.tiff')
+]
+
+
+def build_exif(rng: random.Random, size: str, with_gps: bool) -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = rng.choice(['Canon', 'NIKON CORPORATION', 'Apple', 'SONY'])
+    exif[0x0110] = f"Model {rng.randint(1, 999)}"
+    exif[0x0132] = f"2024:{rng.randint(1, 12):02d}:{rng.randint(1, 28):02d} 12:00:00"
+
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[0x829A] = IFDRational(1, rng.choice([60, 125, 250, 1000]))
+    exif_ifd[0x829D] = IFDRational(rng.randint(14, 220), 10)
+    exif_ifd[0x8827] = rng.choice([100, 200, 400, 3200])
+    exif_ifd[0x9003] = exif[0x0132]
+    exif_ifd[0x920A] = IFDRational(rng.randint(18, 200), 1)
+
+    if size in ('medium', 'large'):
+        exif[0x0131] = 'Benchmark Suite'
+        exif[0x013B] = 'Benchmark Artist'
+        exif[0x8298] = 'Copyright Benchmark'
+        exif_ifd[0x9209] = 16
+        exif_ifd[0xA402] = 0
+        exif_ifd[0xA403] = 0
+        exif_ifd[0xA434] = 'Lens 24-70mm'
+
+    if size == 'large':
+        exif_ifd[0x927C] = rng.randbytes(32 * 1024)
+        exif_ifd[0x9286] = 'x' * 2048
+
+    if with_gps:
+        gps_ifd = exif.get_ifd(0x8825)
+        gps_ifd[1] = rng.choice(['N', 'S'])
+        gps_ifd[2] = (IFDRational(rng.randint(0, 89), 1), IFDRational(rng.randint(0, 59), 1), IFDRational(rng.randint(0, 5999), 100))
+        gps_ifd[3] = rng.choice(['E', 'W'])
+        gps_ifd[4] = (IFDRational(rng.randint(0, 179), 1), IFDRational(rng.randint(0, 59), 1), IFDRational(rng.randint(0, 5999), 100))
+        gps_ifd[6] = IFDRational(rng.randint(0, 30000), 10)
+
+    return exif
+
+
+def build_pdf(rng: random.Random, pages: int) -> bytes:
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(f"{3 + i} 0 R".encode() for i in range(pages)) + b"] /Count " + str(pages).encode() + b" >>"
+    ]
+    for _ in range(pages):
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>")
+    objects.append(
+        f"<< /Title (Benchmark {rng.randint(1, 9999)}) /Author (Bench) /Producer (benchmarks) "
+        f"/CreationDate (D:20240101120000) >>".encode()
+    )
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+    xref_offset = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        body += f"{offset:010d} 00000 n \n".encode()
+    body += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info {len(objects)} 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+
+    return body
+
+
+def generate_corpus(directory, count: int = 200, seed: int = 1234) -> Dict[str, List[Path]]:
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    corpus = {'images': [], 'corrupt': [], 'pdf': []}
+
+    for i in range(count):
+        image_format, extension = IMAGE_FORMATS[i % len(IMAGE_FORMATS)]
+        size = EXIF_SIZES[(i // len(IMAGE_FORMATS)) % len(EXIF_SIZES)]
+        with_gps = i % 2 == 0
+
+        path = directory / f"img_{i:05d}_{size}{'_gps' if with_gps else ''}{extension}"
+        width, height = rng.randint(64, 640), rng.randint(64, 480)
+        image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        image.save(path, image_format, exif=build_exif(rng, size, with_gps))
+        corpus['images'].append(path)
+
+    for i in range(max(1, count // 20)):
+        source = corpus['images'][i % len(corpus['images'])]
+        data = source.read_bytes()
+
+        truncated = directory / f"corrupt_{i:05d}_truncated{source.suffix}"
+        truncated.write_bytes(data[:len(data) // 3])
+        garbage = directory / f"corrupt_{i:05d}_garbage.jpg"
+        garbage.write_bytes(rng.randbytes(len(data)))
+        corpus['corrupt'].extend([truncated, garbage])
+
+    for i in range(max(1, count // 20)):
+        path = directory / f"doc_{i:05d}.pdf"
+        path.write_bytes(build_pdf(rng, pages=rng.choice([1, 10, 500])))
+        corpus['pdf'].append(path)
+
+    return corpus
@@ -0,0 +1,81 @@
+import contextlib
+import os
+import sys
+import time
+from typing import Callable, Dict, Any, Iterable, List
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure(name: str, func: Callable[[Any], Any], items: Iterable[Any], repeat: int = 1) -> Dict[str, Any]:
+    items = list(items)
+    samples = []
+    errors = 0
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            begin = time.perf_counter()
+            try:
+                func(item)
+            except Exception:
+                errors += 1
+            samples.append(time.perf_counter() - begin)
+    total = time.perf_counter() - started
+
+    return {
+        'name': name,
+        'operations': len(samples),
+        'errors': errors,
+        'total_sec': total,
+        'ops_per_sec': len(samples) / total if total > 0 else 0.0,
+        'mean_ms': (sum(samples) / len(samples) * 1000) if samples else 0.0,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def measure_once(name: str, func: Callable[[], int]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    operations = func()
+    total = time.perf_counter() - started
+
+    return {
+        'name': name,
+        'operations': operations,
+        'errors': 0,
+        'total_sec': total,
+        'ops_per_sec': operations / total if total > 0 else 0.0,
+        'mean_ms': total / operations * 1000 if operations else 0.0,
+        'p50_ms': None,
+        'p99_ms': None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+@contextlib.contextmanager
+def null_stdout():
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        with contextlib.redirect_stdout(sink):
+            yield
@@ -0,0 +1,120 @@
+import shutil
+from pathlib import Path
+from typing import Dict, Any, List
+
+from PIL.ExifTags import TAGS, GPSTAGS
+
+from benchmarks.runner import measure, measure_once, null_stdout
+from config import AnalysisConfig
+from core import ExifService, MetadataAnalyzer
+from core.cache import MetadataCache
+from extractors import ImageExtractor, as_metadata_dict
+from output import ConsoleWriter
+from parsers import ExifParser, GPSParser
+
+
+def run_suite(corpus: Dict[str, List[Path]], corpus_dir: Path, repeat: int = 1) -> List[Dict[str, Any]]:
+    images = corpus['images']
+    results = []
+
+    results.append(measure(
+        'ImageExtractor.extract',
+        lambda path: ImageExtractor(path).extract(),
+        images, repeat
+    ))
+    results.append(measure(
+        'ImageExtractor.extract (corrupt)',
+        lambda path: ImageExtractor(path).extract(),
+        corpus['corrupt'], repeat
+    ))
+
+    service = ExifService()
+    results.append(measure(
+        'ExifService.extract_metadata (mixed)',
+        service.extract_metadata,
+        images + corpus['corrupt'] + corpus['pdf'], repeat
+    ))
+
+    metadata_list = [ImageExtractor(path).extract() for path in images]
+    exif_dicts = [
+        {**m['camera_info'], **m['settings_info'], **m['raw_exif']}
+        for m in metadata_list
+    ]
+    tag_ids = {name: tag for tag, name in TAGS.items()}
+    id_dicts = [{tag_ids.get(key, key): value for key, value in tags.items()} for tags in exif_dicts]
+    gps_tag_ids = {name: tag for tag, name in GPSTAGS.items()}
+    gps_dicts = [
+        {gps_tag_ids.get(key, key): value for key, value in m['gps_info'].items()}
+        for m in metadata_list if m['gps_info']
+    ]
+
+    results.append(measure(
+        'ExifParser.categorize_tags',
+        ExifParser.categorize_tags,
+        exif_dicts, repeat
+    ))
+    results.append(measure(
+        'ExifParser.classify_tags',
+        ExifParser.classify_tags,
+        id_dicts, repeat
+    ))
+    results.append(measure(
+        'ExifParser.format_value',
+        lambda tags: [ExifParser.format_value(key, value) for key, value in tags.items()],
+        exif_dicts, repeat
+    ))
+    results.append(measure(
+        'GPSParser.parse',
+        lambda gps: GPSParser.parse(gps, GPSTAGS),
+        gps_dicts, repeat
+    ))
+
+    writer = ConsoleWriter(quiet_mode=True, typing_enabled=False)
+    with null_stdout():
+        results.append(measure(
+            'ConsoleWriter.print_metadata',
+            writer.print_metadata,
+            metadata_list, repeat
+        ))
+
+    results.append(measure_cache_copies(service, images + corpus['pdf'], corpus_dir / 'copies'))
+
+    def analyze_folder():
+        config = AnalysisConfig(
+            file_path="",
+            folder_path=str(corpus_dir),
+            quiet_mode=True,
+            typing_enabled=False,
+            save_enabled=False,
+            show_banner=False
+        )
+        with null_stdout():
+            MetadataAnalyzer(config).analyze_folder()
+        return len(images) + len(corpus['corrupt']) + len(corpus['pdf'])
+
+    results.append(measure_once('MetadataAnalyzer.analyze_folder', analyze_folder))
+
+    return results
+
+
+def measure_cache_copies(service: ExifService, paths: List[Path], copies_dir: Path) -> Dict[str, Any]:
+    # copies of cached files are found by content hash under their new name
+    copies_dir.mkdir(exist_ok=True)
+    cache = MetadataCache(str(copies_dir / 'cache.db'), hash_mode=True)
+    copies = []
+    for path in paths:
+        cache.put(path, service.extract_record(path))
+        copy = copies_dir / f"copy_of_{path.name}"
+        shutil.copyfile(path, copy)
+        copies.append(copy)
+
+    def cached_copy(path):
+        record, _ = cache.get(path)
+        if record is None or as_metadata_dict(record)['basic_info']['file_name'] != path.name:
+            raise ValueError(f"No renamed cache hit for {path}")
+
+    try:
+        return measure('MetadataCache.get (hash, renamed)', cached_copy, copies)
+    finally:
+        cache.close()
+        shutil.rmtree(copies_dir, ignore_errors=True)
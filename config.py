@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, List
 from argparse import Namespace
 
 
@@ -14,6 +14,42 @@ class AnalysisConfig:
     typing_enabled: bool = True
     save_enabled: bool = True
     show_banner: bool = True
+    workers: int = 1
+    ordered_results: bool = True
+    recursive: bool = False
+    max_depth: Optional[int] = None
+    include_patterns: List[str] = field(default_factory=list)
+    exclude_patterns: List[str] = field(default_factory=list)
+    symlink_policy: str = 'files'
+    skip_hidden: bool = False
+    detect_content: bool = False
+    cache_enabled: bool = False
+    cache_path: str = "./.metadata_cache.db"
+    cache_hash: bool = False
+    cache_size_mb: int = 512
+    rebuild_cache: bool = False
+    incremental: bool = False
+    watch: bool = False
+    watch_settle: float = 1.0
+    watch_poll_interval: Optional[float] = None
+    dedup: bool = False
+    index_path: Optional[str] = None
+    index_hash: bool = False
+    output_format: str = 'text'
+    single_file: bool = False
+    rotate_size_mb: Optional[int] = None
+    fsync_every: Optional[int] = None
+    progress_only: bool = False
+    tag_categories_path: Optional[str] = None
+    fields: List[str] = field(default_factory=list)
+    gps_summary: bool = False
+    gps_export: Optional[str] = None
+    gps_cell_size: float = 0.01
+    geocode_path: Optional[str] = None
+    geocode_radius_km: float = 100.0
+    prefix_read_kb: Optional[int] = None
+    profile: bool = False
+    profile_json: Optional[str] = None
     
     @classmethod
     def from_args(cls, args: Namespace) -> 'AnalysisConfig':
@@ -21,6 +57,8 @@ class AnalysisConfig:
         typing_enabled = not args.no_typing and not args.quiet
         save_enabled = not args.no_save
         show_banner = not args.no_banner and not args.quiet
+        rebuild_cache = getattr(args, 'rebuild_cache', False)
+        cache_enabled = (getattr(args, 'cache', False) or rebuild_cache) and not getattr(args, 'no_cache', False)
         
         return cls(
             file_path=args.input if args.input else "",
@@ -30,7 +68,48 @@ class AnalysisConfig:
             quiet_mode=quiet_mode,
             typing_enabled=typing_enabled,
             save_enabled=save_enabled,
-            show_banner=show_banner
+            show_banner=show_banner,
+            workers=getattr(args, 'workers', 1),
+            ordered_results=not getattr(args, 'unordered', False),
+            recursive=getattr(args, 'recursive', False) or getattr(args, 'max_depth', None) is not None,
+            max_depth=getattr(args, 'max_depth', None),
+            include_patterns=getattr(args, 'include', None) or [],
+            exclude_patterns=getattr(args, 'exclude', None) or [],
+            symlink_policy=getattr(args, 'symlinks', 'files'),
+            skip_hidden=getattr(args, 'skip_hidden', False),
+            detect_content=getattr(args, 'detect_content', False),
+            cache_enabled=cache_enabled,
+            cache_path=getattr(args, 'cache_file', None) or "./.metadata_cache.db",
+            cache_hash=getattr(args, 'cache_hash', False),
+            cache_size_mb=getattr(args, 'cache_size', None) or 512,
+            rebuild_cache=rebuild_cache,
+            incremental=getattr(args, 'incremental', False),
+            watch=getattr(args, 'watch', False),
+            watch_settle=getattr(args, 'watch_settle', None) or 1.0,
+            watch_poll_interval=getattr(args, 'watch_poll', None),
+            dedup=getattr(args, 'dedup', False),
+            index_path=getattr(args, 'index', None),
+            index_hash=getattr(args, 'index_hash', False),
+            output_format=getattr(args, 'format', None) or 'text',
+            single_file=getattr(args, 'single_file', False),
+            rotate_size_mb=getattr(args, 'rotate_size', None),
+            fsync_every=getattr(args, 'fsync_every', None),
+            progress_only=getattr(args, 'progress', False),
+            tag_categories_path=getattr(args, 'tag_categories', None),
+            fields=[
+                name.strip()
+                for value in (getattr(args, 'fields', None) or [])
+                for name in value.split(',')
+                if name.strip()
+            ],
+            gps_summary=getattr(args, 'gps_summary', False) or bool(getattr(args, 'gps_export', None)),
+            gps_export=getattr(args, 'gps_export', None),
+            gps_cell_size=getattr(args, 'gps_cell', None) or 0.01,
+            geocode_path=getattr(args, 'geocode', None),
+            geocode_radius_km=getattr(args, 'geocode_radius', None) or 100.0,
+            prefix_read_kb=getattr(args, 'prefix_read', None),
+            profile=getattr(args, 'profile', False) or bool(getattr(args, 'profile_json', None)),
+            profile_json=getattr(args, 'profile_json', None)
         )
     
     @classmethod
@@ -1,5 +1,25 @@
-from .reader import FileReader
-from .exif_service import ExifService
-from .metadata_analyzer import MetadataAnalyzer
+import importlib
 
-__all__ = ['FileReader', 'ExifService', 'MetadataAnalyzer']
+# public name -> defining submodule; submodules are imported on first access
+# so that a single-file run never pays for asyncio or the GPS batch code
+_EXPORTS = {
+    'FileReader': '.reader',
+    'ExifService': '.exif_service',
+    'AsyncExifService': '.async_service',
+    'MetadataAnalyzer': '.metadata_analyzer',
+    'GPSBatch': '.geo',
+}
+
+__all__ = ['FileReader', 'ExifService', 'AsyncExifService', 'MetadataAnalyzer', 'GPSBatch']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
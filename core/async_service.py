@@ -0,0 +1,98 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Tuple, Optional, AsyncIterator, Iterable, AsyncIterable, Union
+
+from core.exif_service import ExifService, extract_file
+
+
+class AsyncExifService:
+
+    EXECUTORS = ['thread', 'process']
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        executor: str = 'thread',
+        max_workers: Optional[int] = None,
+        ordered: bool = False
+    ):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor type: {executor}")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.ordered = ordered
+        self.service = ExifService()
+
+        workers = max_workers or max_concurrency
+        if executor == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='exif')
+
+    async def extract_metadata(self, file_path: Union[str, Path]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.service.extract_metadata, Path(file_path))
+
+    async def extract_many(
+        self,
+        paths: Union[Iterable, AsyncIterable]
+    ) -> AsyncIterator[Tuple[Path, Optional[Dict[str, Any]], Optional[str]]]:
+        loop = asyncio.get_running_loop()
+        source = self._iterate(paths)
+        in_flight = deque()
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(in_flight) < self.max_concurrency:
+                    try:
+                        file_path = Path(await source.__anext__())
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+
+                    future = loop.run_in_executor(self.executor, extract_file, file_path)
+                    in_flight.append((file_path, future))
+
+                if not in_flight:
+                    break
+
+                if self.ordered:
+                    file_path, future = in_flight[0]
+                    await asyncio.wait([future])
+                    in_flight.popleft()
+                else:
+                    done, _ = await asyncio.wait(
+                        [future for _, future in in_flight],
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    file_path, future = next(entry for entry in in_flight if entry[1] in done)
+                    in_flight.remove((file_path, future))
+
+                metadata, error_message = future.result()
+                yield file_path, metadata, error_message
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            await source.aclose()
+
+    def close(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def _iterate(self, paths):
+        if hasattr(paths, '__aiter__'):
+            async for file_path in paths:
+                yield file_path
+        else:
+            for file_path in paths:
+                yield file_path
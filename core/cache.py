@@ -0,0 +1,227 @@
+import base64
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from PIL.TiffImagePlugin import IFDRational
+
+from extractors import MetadataRecord, with_file_name
+from utils import hash_file
+
+
+def encode_metadata(value):
+    # JSON that decode_metadata turns back into the same record: tag IDs,
+    # tuples, bytes and rationals are tagged instead of flattened
+    if isinstance(value, MetadataRecord):
+        return {'$m': {name: encode_metadata(getattr(value, name)) for name in MetadataRecord.__slots__}}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith('$') for key in value):
+            return {key: encode_metadata(item) for key, item in value.items()}
+        return {'$d': [[encode_metadata(key), encode_metadata(item)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {'$t': [encode_metadata(item) for item in value]}
+    if isinstance(value, list):
+        return [encode_metadata(item) for item in value]
+    if isinstance(value, bytes):
+        return {'$b': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, IFDRational):
+        return {'$r': [value.numerator, value.denominator]}
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+
+def _decode_object(obj: Dict[str, Any]):
+    if len(obj) != 1:
+        return obj
+
+    key, value = next(iter(obj.items()))
+    if key == '$m':
+        return MetadataRecord(**value)
+    if key == '$d':
+        return {item_key: item for item_key, item in value}
+    if key == '$t':
+        return tuple(value)
+    if key == '$b':
+        return base64.b64decode(value)
+    if key == '$r':
+        return IFDRational(*value)
+    return obj
+
+
+def decode_metadata(text):
+    return json.loads(text, object_hook=_decode_object)
+
+
+class MetadataCache:
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT,
+            metadata TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            accessed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+        CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+    """
+
+    COMMIT_INTERVAL = 500
+
+    def __init__(self, cache_path: str, hash_mode: bool = False, max_size_mb: int = 512):
+        self.cache_path = Path(cache_path)
+        self.hash_mode = hash_mode
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.pending_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.cache_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        self.total_bytes = self.connection.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM entries"
+        ).fetchone()[0]
+
+    def get(self, file_path: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        # (metadata, content digest); the digest of a hash-mode miss is handed
+        # back so put() need not read the file again
+        key = self._file_key(file_path)
+        if key is None:
+            self.misses += 1
+            return None, None
+
+        path, size, mtime_ns = key
+
+        row = self.connection.execute(
+            "SELECT path, metadata, digest FROM entries WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, size, mtime_ns)
+        ).fetchone()
+
+        if row is None and self.hash_mode:
+            digest = hash_file(file_path)
+            if digest is None:
+                self.misses += 1
+                return None, None
+            row = self.connection.execute(
+                "SELECT path, metadata, digest FROM entries WHERE digest = ? AND size = ? LIMIT 1",
+                (digest, size)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, digest
+
+        if row is None:
+            self.misses += 1
+            return None, None
+
+        digest = row[2]
+        try:
+            metadata = decode_metadata(row[1])
+        except (ValueError, TypeError, KeyError):
+            # truncated, or written by another version of the cache or the record
+            self._remove(row[0])
+            self._mark_dirty()
+            self.misses += 1
+            return None, digest
+
+        self.connection.execute(
+            "UPDATE entries SET accessed = ? WHERE path = ?",
+            (time.time(), row[0])
+        )
+        self._mark_dirty()
+        self.hits += 1
+
+        if row[0] != path:
+            metadata = with_file_name(metadata, Path(file_path).name)
+            self.put(file_path, metadata, digest)
+
+        return metadata, digest
+
+    def put(self, file_path: Path, metadata: Dict[str, Any], digest: Optional[str] = None):
+        key = self._file_key(file_path)
+        if key is None:
+            return
+
+        path, size, mtime_ns = key
+        if digest is None and self.hash_mode:
+            digest = hash_file(file_path)
+        try:
+            blob = json.dumps(encode_metadata(metadata))
+        except (TypeError, ValueError):
+            return
+
+        previous = self.connection.execute(
+            "SELECT bytes FROM entries WHERE path = ?", (path,)
+        ).fetchone()
+        if previous:
+            self.total_bytes -= previous[0]
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, digest, blob, len(blob), time.time())
+        )
+        self.total_bytes += len(blob)
+
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+        self._mark_dirty()
+
+    def clear(self):
+        self.connection.execute("DELETE FROM entries")
+        self.connection.commit()
+        self.connection.execute("VACUUM")
+        self.total_bytes = 0
+        self.pending_writes = 0
+
+    def flush(self):
+        self.connection.commit()
+        self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def _remove(self, path: str):
+        row = self.connection.execute("SELECT bytes FROM entries WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.total_bytes -= row[0]
+            self.connection.execute("DELETE FROM entries WHERE path = ?", (path,))
+
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        rows = self.connection.execute(
+            "SELECT path, bytes FROM entries ORDER BY accessed"
+        )
+
+        evicted = []
+        for path, size in rows:
+            if self.total_bytes <= target:
+                break
+            evicted.append((path,))
+            self.total_bytes -= size
+
+        self.connection.executemany("DELETE FROM entries WHERE path = ?", evicted)
+
+    def _mark_dirty(self):
+        self.pending_writes += 1
+        if self.pending_writes >= self.COMMIT_INTERVAL:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def _file_key(self, file_path: Path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
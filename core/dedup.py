@@ -0,0 +1,182 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import hash_file
+
+
+class DuplicateIndex:
+
+    # files are checked as they stream in: a file is only read when an earlier
+    # file has the same size, and only fully hashed when the head and tail
+    # blocks of both match too
+    BLOCK_SIZE = 64 * 1024
+    MAX_RESULTS = 1024
+    MAX_FILES = 100_000
+
+    def __init__(self, block_size: int = BLOCK_SIZE, max_results: int = MAX_RESULTS, max_files: int = MAX_FILES):
+        self.block_size = block_size
+        self.max_results = max_results
+        self.max_files = max_files
+        # path -> [size, mtime_ns, partial digest, full digest], least recently
+        # checked first; evicting a path drops it from every table below
+        self.files: OrderedDict = OrderedDict()
+        # size -> the one file of that size not yet partially hashed
+        self.sizes: Dict[int, Optional[Path]] = {}
+        self.size_counts: Dict[int, int] = {}
+        # (size, partial digest) -> files not yet fully hashed
+        self.partials: Dict[Tuple[int, bytes], List[Path]] = {}
+        self.partial_counts: Dict[Tuple[int, bytes], int] = {}
+        # (size, full digest) -> files with that content, the original first
+        self.fulls: Dict[Tuple[int, str], List[Path]] = {}
+        self.results: OrderedDict = OrderedDict()
+        self.duplicates = 0
+        self.partial_hashes = 0
+        self.full_hashes = 0
+
+    def check(self, file_path: Path) -> Tuple[Optional[Path], Optional[str]]:
+        # (original, full digest of file_path if one was computed)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None, None
+
+        size = stat.st_size
+        state = self._track(file_path, size, stat.st_mtime_ns)
+
+        if size not in self.sizes:
+            self.sizes[size] = file_path
+            return None, None
+
+        first = self.sizes[size]
+        if first == file_path:
+            # the same file checked again
+            return None, None
+        if first is not None:
+            self.sizes[size] = None
+            self._add_partial(first, self.files[first])
+
+        key = self._add_partial(file_path, state)
+        if key is None or self.partial_counts[key] == 1:
+            return None, None
+
+        group = self.partials[key]
+        digest = None
+        if size <= 2 * self.block_size:
+            # the head and tail blocks already covered the whole file
+            original = group[0]
+            if original == file_path:
+                return None, None
+        else:
+            for candidate in group:
+                if candidate != file_path:
+                    self._add_full(candidate, self.files[candidate])
+            group.clear()
+
+            digest = self._add_full(file_path, state)
+            if digest is None:
+                return None, None
+            original = self.fulls[(size, digest)][0]
+            if original == file_path:
+                return None, digest
+
+        self.duplicates += 1
+        return original, digest
+
+    def remember(self, file_path: Path, result: tuple):
+        self.results[file_path] = result
+        if len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+
+    def result(self, file_path: Path) -> Optional[tuple]:
+        result = self.results.get(file_path)
+        if result is not None:
+            self.results.move_to_end(file_path)
+        return result
+
+    def _track(self, file_path: Path, size: int, mtime_ns: int) -> list:
+        state = self.files.get(file_path)
+        if state is not None:
+            if state[0] == size and state[1] == mtime_ns:
+                self.files.move_to_end(file_path)
+                return state
+            # rewritten since it was last checked
+            self._forget(file_path)
+
+        state = [size, mtime_ns, None, None]
+        self.files[file_path] = state
+        self.size_counts[size] = self.size_counts.get(size, 0) + 1
+        while len(self.files) > self.max_files:
+            self._forget(next(iter(self.files)))
+        return state
+
+    def _forget(self, file_path: Path):
+        size, _, partial, full = self.files.pop(file_path)
+        self.results.pop(file_path, None)
+
+        self.size_counts[size] -= 1
+        if not self.size_counts[size]:
+            del self.size_counts[size]
+            self.sizes.pop(size, None)
+        elif self.sizes.get(size) == file_path:
+            self.sizes[size] = None
+
+        if partial is not None:
+            key = (size, partial)
+            if file_path in self.partials[key]:
+                self.partials[key].remove(file_path)
+            self.partial_counts[key] -= 1
+            if not self.partial_counts[key]:
+                del self.partial_counts[key]
+                del self.partials[key]
+
+        if full is not None:
+            key = (size, full)
+            self.fulls[key].remove(file_path)
+            if not self.fulls[key]:
+                del self.fulls[key]
+
+    def _add_partial(self, file_path: Path, state: list) -> Optional[Tuple[int, bytes]]:
+        size = state[0]
+        if state[2] is None:
+            partial = self._partial_hash(file_path, size)
+            if partial is None:
+                return None
+            state[2] = partial
+            key = (size, partial)
+            self.partials.setdefault(key, []).append(file_path)
+            self.partial_counts[key] = self.partial_counts.get(key, 0) + 1
+        return (size, state[2])
+
+    def _add_full(self, file_path: Path, state: list) -> Optional[str]:
+        if state[3] is None:
+            digest = self._full_hash(file_path)
+            if digest is None:
+                return None
+            state[3] = digest
+            self.fulls.setdefault((state[0], digest), []).append(file_path)
+        return state[3]
+
+    def _partial_hash(self, file_path: Path, size: int) -> Optional[bytes]:
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(file_path, 'rb') as f:
+                if size <= 2 * self.block_size:
+                    digest.update(f.read())
+                else:
+                    digest.update(f.read(self.block_size))
+                    f.seek(-self.block_size, os.SEEK_END)
+                    digest.update(f.read(self.block_size))
+        except OSError:
+            return None
+
+        self.partial_hashes += 1
+        return digest.digest()
+
+    def _full_hash(self, file_path: Path) -> Optional[str]:
+        digest = hash_file(file_path)
+        if digest is not None:
+            self.full_hashes += 1
+        return digest
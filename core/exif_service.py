@@ -1,8 +1,12 @@
 from pathlib import Path
 from typing import Dict, Any, Tuple, Optional
 
-from extractors import ImageExtractor
+from PIL import UnidentifiedImageError
+
+from core.reader import FileReader
+from extractors import ExtractorRegistry, UnsupportedFormatError, MetadataRecord, FieldSelection, as_metadata_dict
 from parsers import GPSParser, ExifParser
+from utils import profiled
 
 
 class ExifService:
@@ -10,25 +14,72 @@ class ExifService:
     def __init__(self):
         self.gps_parser = GPSParser
         self.exif_parser = ExifParser
+        self.registry = ExtractorRegistry
+    
+    @profiled('ExifService.extract')
+    def extract_metadata(
+        self,
+        file_path: Path,
+        fields: Optional[FieldSelection] = None,
+        prefix_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return self.registry.extract(file_path, fields=fields, prefix_size=prefix_size)
     
-    def extract_metadata(self, file_path: Path) -> Dict[str, Any]:
-        extractor = ImageExtractor(file_path)
-        metadata = extractor.extract()
-        return metadata
+    @profiled('ExifService.extract')
+    def extract_record(
+        self,
+        file_path: Path,
+        fields: Optional[FieldSelection] = None,
+        prefix_size: Optional[int] = None
+    ) -> MetadataRecord:
+        return self.registry.extract(file_path, record=True, fields=fields, prefix_size=prefix_size)
     
     def extract_gps_coordinates(self, metadata: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
         return metadata.get('gps_coords', (None, None))
     
     def has_metadata(self, metadata: Dict[str, Any]) -> bool:
+        metadata = as_metadata_dict(metadata)
         return bool(
             metadata.get('camera_info') or 
             metadata.get('settings_info') or 
-            metadata.get('raw_exif')
+            metadata.get('raw_exif') or
+            metadata.get('pdf_metadata') or
+            metadata.get('xmp_metadata')
         )
     
     def count_tags(self, metadata: Dict[str, Any]) -> int:
+        metadata = as_metadata_dict(metadata)
         return (
             len(metadata.get('camera_info', {})) +
             len(metadata.get('settings_info', {})) +
-            len(metadata.get('raw_exif', {}))
+            len(metadata.get('raw_exif', {})) +
+            len(metadata.get('pdf_metadata', {})) +
+            len(metadata.get('xmp_metadata', {}))
         )
+
+
+def extract_file(
+    file_path: Path,
+    record: bool = False,
+    fields: Optional[FieldSelection] = None,
+    prefix_size: Optional[int] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    reader = FileReader(str(file_path))
+    is_valid, error_message = reader.validate()
+    
+    if not is_valid:
+        return None, error_message
+    
+    try:
+        service = ExifService()
+        if record:
+            return service.extract_record(file_path, fields, prefix_size), None
+        return service.extract_metadata(file_path, fields, prefix_size), None
+    except FileNotFoundError:
+        return None, "File not found"
+    except UnidentifiedImageError:
+        return None, "Invalid or corrupted image"
+    except UnsupportedFormatError:
+        return None, reader.unsupported_message()
+    except Exception as e:
+        return None, f"Error extracting metadata: {e}"
@@ -0,0 +1,351 @@
+import csv
+import json
+import math
+from array import array
+from datetime import date, datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from PIL.ExifTags import GPSTAGS
+
+from extractors import MetadataRecord
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+GPS_TAG_IDS = {name: tag_id for tag_id, name in GPSTAGS.items()}
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class GPSBatch:
+
+    # one float column per value, so a million rows stay a few flat buffers
+    # that NumPy can wrap without copying
+    COLUMNS = [
+        'lat_deg', 'lat_min', 'lat_sec', 'lat_sign',
+        'lon_deg', 'lon_min', 'lon_sec', 'lon_sign',
+        'alt', 'alt_sign',
+        'day', 'hour', 'minute', 'second'
+    ]
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.columns: Dict[str, array] = {name: array('d') for name in self.COLUMNS}
+        self.without_gps = 0
+        self._converted = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, file_path, metadata) -> bool:
+        gps = self._gps_tags(metadata)
+        row = self._row(gps) if gps else None
+
+        if row is None:
+            self.without_gps += 1
+            return False
+
+        self.paths.append(str(file_path))
+        for name, value in zip(self.COLUMNS, row):
+            self.columns[name].append(value)
+
+        self._converted = None
+        return True
+
+    @staticmethod
+    def _gps_tags(metadata) -> Optional[Dict[int, Any]]:
+        if isinstance(metadata, MetadataRecord):
+            return metadata.gps_tags
+        if not metadata:
+            return None
+
+        gps_info = metadata.get('gps_info') or {}
+        return {GPS_TAG_IDS.get(name, name): value for name, value in gps_info.items()}
+
+    @staticmethod
+    def _row(gps: Dict[int, Any]) -> Optional[Tuple[float, ...]]:
+        try:
+            lat = [float(part) for part in gps[2]]
+            lon = [float(part) for part in gps[4]]
+            lat_ref = gps[1]
+            lon_ref = gps[3]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if len(lat) != 3 or len(lon) != 3:
+            return None
+
+        nan = math.nan
+
+        try:
+            alt = float(gps[6])
+        except (KeyError, TypeError, ValueError):
+            alt = nan
+
+        alt_ref = gps.get(5, 0)
+        if isinstance(alt_ref, bytes):
+            alt_ref = alt_ref[:1] == b'\x01'
+
+        try:
+            day = date(*(int(part) for part in str(gps[29]).split(':'))).toordinal() - EPOCH_ORDINAL
+            hour, minute, second = (float(part) for part in gps[7])
+        except (KeyError, TypeError, ValueError):
+            day = hour = minute = second = nan
+
+        return (
+            lat[0], lat[1], lat[2], -1.0 if lat_ref in ('S', 's') else 1.0,
+            lon[0], lon[1], lon[2], -1.0 if lon_ref in ('W', 'w') else 1.0,
+            alt, -1.0 if alt_ref else 1.0,
+            day, hour, minute, second
+        )
+
+    def convert(self) -> Dict[str, Any]:
+        if self._converted is not None:
+            return self._converted
+
+        c = self.columns
+
+        if numpy is not None:
+            col = {name: numpy.frombuffer(values, dtype=numpy.float64) for name, values in c.items()}
+            converted = {
+                'lat': col['lat_sign'] * (col['lat_deg'] + col['lat_min'] / 60.0 + col['lat_sec'] / 3600.0),
+                'lon': col['lon_sign'] * (col['lon_deg'] + col['lon_min'] / 60.0 + col['lon_sec'] / 3600.0),
+                'alt': col['alt_sign'] * col['alt'],
+                'time': col['day'] * 86400.0 + col['hour'] * 3600.0 + col['minute'] * 60.0 + col['second']
+            }
+            valid = (
+                numpy.isfinite(converted['lat']) & numpy.isfinite(converted['lon']) &
+                (numpy.abs(converted['lat']) <= 90.0) & (numpy.abs(converted['lon']) <= 180.0)
+            )
+        else:
+            converted = {
+                'lat': [s * (d + m / 60.0 + sec / 3600.0) for d, m, sec, s in
+                        zip(c['lat_deg'], c['lat_min'], c['lat_sec'], c['lat_sign'])],
+                'lon': [s * (d + m / 60.0 + sec / 3600.0) for d, m, sec, s in
+                        zip(c['lon_deg'], c['lon_min'], c['lon_sec'], c['lon_sign'])],
+                'alt': [s * a for a, s in zip(c['alt'], c['alt_sign'])],
+                'time': [d * 86400.0 + h * 3600.0 + m * 60.0 + s for d, h, m, s in
+                         zip(c['day'], c['hour'], c['minute'], c['second'])]
+            }
+            valid = [
+                math.isfinite(lat) and math.isfinite(lon) and abs(lat) <= 90.0 and abs(lon) <= 180.0
+                for lat, lon in zip(converted['lat'], converted['lon'])
+            ]
+
+        converted['valid'] = valid
+        self._converted = converted
+        return converted
+
+    def _valid_points(self):
+        converted = self.convert()
+        valid = converted['valid']
+
+        if numpy is not None:
+            return converted['lat'][valid], converted['lon'][valid]
+
+        lats = [lat for lat, ok in zip(converted['lat'], valid) if ok]
+        lons = [lon for lon, ok in zip(converted['lon'], valid) if ok]
+        return lats, lons
+
+    def bounding_box(self) -> Optional[Tuple[float, float, float, float]]:
+        lats, lons = self._valid_points()
+        if not len(lats):
+            return None
+        if numpy is not None:
+            return float(lats.min()), float(lons.min()), float(lats.max()), float(lons.max())
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def valid_count(self) -> int:
+        valid = self.convert()['valid']
+        if numpy is not None:
+            return int(numpy.count_nonzero(valid))
+        return sum(valid)
+
+    def grid_histogram(self, cell_size: float = 0.01) -> Dict[Tuple[int, int], int]:
+        lats, lons = self._valid_points()
+
+        if numpy is not None:
+            if not len(lats):
+                return {}
+            # fold (row, column) into one integer key so unique() runs on a flat array
+            offset = int(math.ceil(180.0 / cell_size)) + 1
+            span = 2 * offset + 1
+            keys = (
+                numpy.floor(lats / cell_size).astype(numpy.int64) * span +
+                numpy.floor(lons / cell_size).astype(numpy.int64) + offset
+            )
+            unique, counts = numpy.unique(keys, return_counts=True)
+            histogram = {}
+            for key, count in zip(unique.tolist(), counts.tolist()):
+                row, column = divmod(key, span)
+                histogram[(row, column - offset)] = count
+            return histogram
+
+        histogram = {}
+        for lat, lon in zip(lats, lons):
+            cell = (math.floor(lat / cell_size), math.floor(lon / cell_size))
+            histogram[cell] = histogram.get(cell, 0) + 1
+        return histogram
+
+    def clusters(self, cell_size: float = 0.01, histogram=None) -> List[Dict[str, Any]]:
+        if histogram is None:
+            histogram = self.grid_histogram(cell_size)
+
+        neighbours = [(d_lat, d_lon) for d_lat in (-1, 0, 1) for d_lon in (-1, 0, 1) if d_lat or d_lon]
+        seen = set()
+        clusters = []
+
+        # connected groups of occupied grid cells (8-neighbourhood)
+        for start in histogram:
+            if start in seen:
+                continue
+
+            seen.add(start)
+            stack = [start]
+            cells = count = 0
+            lat_sum = lon_sum = 0.0
+            min_row = max_row = start[0]
+            min_column = max_column = start[1]
+
+            while stack:
+                row, column = stack.pop()
+                cell_count = histogram[(row, column)]
+
+                cells += 1
+                count += cell_count
+                lat_sum += (row + 0.5) * cell_count
+                lon_sum += (column + 0.5) * cell_count
+                min_row = min(min_row, row)
+                max_row = max(max_row, row)
+                min_column = min(min_column, column)
+                max_column = max(max_column, column)
+
+                for d_lat, d_lon in neighbours:
+                    neighbour = (row + d_lat, column + d_lon)
+                    if neighbour in histogram and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+
+            clusters.append({
+                'count': count,
+                'cells': cells,
+                'center': (lat_sum / count * cell_size, lon_sum / count * cell_size),
+                'bbox': (
+                    min_row * cell_size,
+                    min_column * cell_size,
+                    (max_row + 1) * cell_size,
+                    (max_column + 1) * cell_size
+                )
+            })
+
+        clusters.sort(key=lambda cluster: (-cluster['count'], cluster['center']))
+        return clusters
+
+    def summary(self, cell_size: float = 0.01, top: int = 10) -> Dict[str, Any]:
+        histogram = self.grid_histogram(cell_size)
+        top_cells = sorted(histogram.items(), key=lambda item: (-item[1], item[0]))[:top]
+        clusters = self.clusters(cell_size, histogram)
+        with_gps = self.valid_count()
+
+        return {
+            'with_gps': with_gps,
+            'without_gps': self.without_gps + len(self) - with_gps,
+            'bbox': self.bounding_box(),
+            'cell_size': cell_size,
+            'occupied_cells': len(histogram),
+            'top_cells': [
+                {'lat': lat * cell_size, 'lon': lon * cell_size, 'count': count}
+                for (lat, lon), count in top_cells
+            ],
+            'cluster_count': len(clusters),
+            'clusters': clusters[:top]
+        }
+
+    def _rows(self, geocoder=None):
+        rows = self._point_rows()
+        if geocoder is None:
+            return rows
+        return self._located_rows(rows, geocoder)
+
+    @staticmethod
+    def _located_rows(rows, geocoder, batch_size: int = 4096):
+        # nearest places are looked up a batch at a time
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+
+            places = geocoder.lookup_many((row['lat'], row['lon']) for row in batch)
+            for row, place in zip(batch, places):
+                row['place'] = place['place'] if place else None
+                row['country'] = place['country'] if place else None
+                yield row
+
+    def _point_rows(self):
+        converted = self.convert()
+        columns = [converted[name] for name in ('valid', 'lat', 'lon', 'alt', 'time')]
+        if numpy is not None:
+            columns = [column.tolist() for column in columns]
+
+        for path, valid, lat, lon, alt, timestamp in zip(self.paths, *columns):
+            if not valid:
+                continue
+
+            yield {
+                'file': path,
+                'lat': lat,
+                'lon': lon,
+                'alt': alt if math.isfinite(alt) else None,
+                'time': (
+                    datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+                    if math.isfinite(timestamp) else None
+                )
+            }
+
+    def export(self, output_path, geocoder=None) -> int:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_path.suffix.lower() == '.csv':
+            return self._write_csv(output_path, geocoder)
+        return self._write_geojson(output_path, geocoder)
+
+    def _write_csv(self, output_path: Path, geocoder=None) -> int:
+        fieldnames = ['file', 'lat', 'lon', 'alt', 'time']
+        if geocoder is not None:
+            fieldnames += ['place', 'country']
+
+        written = 0
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in self._rows(geocoder):
+                writer.writerow(row)
+                written += 1
+        return written
+
+    def _write_geojson(self, output_path: Path, geocoder=None) -> int:
+        written = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "FeatureCollection", "features": [\n')
+            for row in self._rows(geocoder):
+                coordinates = [row['lon'], row['lat']]
+                if row['alt'] is not None:
+                    coordinates.append(row['alt'])
+
+                feature = {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': coordinates},
+                    'properties': {'file': row['file'], 'time': row['time']}
+                }
+                if geocoder is not None:
+                    feature['properties'].update(place=row['place'], country=row['country'])
+                f.write((',\n' if written else '') + json.dumps(feature))
+                written += 1
+            f.write('\n]}\n')
+        return written
@@ -0,0 +1,398 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from utils import profiled
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ReverseGeocoder:
+
+    MAGIC = b'MDGZ'
+    VERSION = 1
+    # magic, version, native byte order is little-endian, place count, grid
+    # rows and columns, cell size, and the size and mtime of the gazetteer the
+    # index was built from (a changed dump rebuilds it)
+    HEADER = struct.Struct('<4sIIIIIdqq')
+    ALIGNMENT = 8
+
+    CELL_SIZE = 0.25
+    FEATURE_CLASSES = ('P',)
+    MAX_DISTANCE_KM = 100.0
+    MEMO_SIZE = 100000
+    BATCH_SIZE = 4096
+
+    def __init__(self, gazetteer_path, index_path=None, max_distance_km: float = MAX_DISTANCE_KM):
+        self.gazetteer_path = Path(gazetteer_path)
+        self.index_path = Path(index_path) if index_path else self.default_index_path(self.gazetteer_path)
+        self.max_distance_km = max_distance_km
+        self.built = False
+        self._arrays = None
+        self.name_cache: Dict[int, Tuple[str, str]] = {}
+        self.memo: Dict[Tuple[float, float], Optional[Dict[str, Any]]] = {}
+
+        # a prebuilt .idx can be used on its own, without the dump
+        source = None if self.gazetteer_path == self.index_path else os.stat(self.gazetteer_path)
+        if not self._load(source):
+            self.build(self.gazetteer_path, self.index_path)
+            self.built = True
+            if not self._load(source):
+                raise ValueError(f"Could not load geocoding index {self.index_path}")
+
+    @staticmethod
+    def default_index_path(gazetteer_path: Path) -> Path:
+        if gazetteer_path.suffix == '.idx':
+            return gazetteer_path
+        return gazetteer_path.with_name(gazetteer_path.name + '.idx')
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def build(cls, gazetteer_path, index_path, cell_size: float = CELL_SIZE) -> int:
+        rows = int(round(180.0 / cell_size))
+        columns = int(round(360.0 / cell_size))
+
+        cells = array('I')
+        lats = array('f')
+        lons = array('f')
+        names: List[bytes] = []
+        countries = bytearray()
+
+        # GeoNames dump: tab-separated geonameid, name, asciiname, alternatenames,
+        # latitude, longitude, feature class, feature code, country code, ...
+        with open(gazetteer_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) < 9 or parts[6] not in cls.FEATURE_CLASSES:
+                    continue
+                try:
+                    lat = float(parts[4])
+                    lon = float(parts[5])
+                except ValueError:
+                    continue
+                if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                    continue
+
+                row = min(rows - 1, int((lat + 90.0) / cell_size))
+                column = min(columns - 1, int((lon + 180.0) / cell_size))
+                cells.append(row * columns + column)
+                lats.append(lat)
+                lons.append(lon)
+                names.append(parts[1].encode('utf-8'))
+                countries += (parts[8].encode('ascii', 'replace') + b'  ')[:2]
+
+        count = len(cells)
+        if not count:
+            raise ValueError(f"No populated places found in gazetteer {gazetteer_path}")
+        order = sorted(range(count), key=cells.__getitem__)
+
+        # places sorted by grid cell, with the start of every cell's run
+        starts = array('I', bytes(4 * (rows * columns + 1)))
+        for cell in cells:
+            starts[cell + 1] += 1
+        for cell in range(rows * columns):
+            starts[cell + 1] += starts[cell]
+
+        name_offsets = array('I', [0])
+        name_blob = bytearray()
+        for i in order:
+            name_blob += names[i]
+            name_offsets.append(len(name_blob))
+
+        sorted_countries = bytearray(2 * count)
+        for position, i in enumerate(order):
+            sorted_countries[2 * position:2 * position + 2] = countries[2 * i:2 * i + 2]
+
+        source = os.stat(gazetteer_path)
+        sections = [
+            starts.tobytes(),
+            array('f', (lats[i] for i in order)).tobytes(),
+            array('f', (lons[i] for i in order)).tobytes(),
+            name_offsets.tobytes(),
+            bytes(sorted_countries),
+            bytes(name_blob)
+        ]
+
+        index_path = Path(index_path)
+        temp_path = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(
+                cls.MAGIC, cls.VERSION, sys.byteorder == 'little', count, rows, columns, cell_size,
+                source.st_size, source.st_mtime_ns
+            ))
+            for section in sections:
+                f.write(bytes(-f.tell() % cls.ALIGNMENT))
+                f.write(section)
+        os.replace(temp_path, index_path)
+
+        return count
+
+    def _load(self, source) -> bool:
+        try:
+            f = open(self.index_path, 'rb')
+        except OSError:
+            return False
+
+        with f:
+            header = f.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                return False
+
+            magic, version, little_endian, count, rows, columns, cell_size, size, mtime_ns = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION or little_endian != (sys.byteorder == 'little'):
+                return False
+            if source is not None and (size, mtime_ns) != (source.st_size, source.st_mtime_ns):
+                return False
+
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.count = count
+        self.rows = rows
+        self.columns = columns
+        self.cell_size = cell_size
+
+        # typed views straight over the mapped file; nothing is parsed or copied
+        view = memoryview(self.mapped)
+        offset = self.HEADER.size
+
+        def section(code, length, itemsize):
+            nonlocal offset
+            offset += -offset % self.ALIGNMENT
+            part = view[offset:offset + length * itemsize]
+            offset += length * itemsize
+            return part.cast(code) if code else part
+
+        self.starts = section('I', rows * columns + 1, 4)
+        self.lats = section('f', count, 4)
+        self.lons = section('f', count, 4)
+        self.name_offsets = section('I', count + 1, 4)
+        self.countries = section(None, count, 2)
+        self.names = view[offset + -offset % self.ALIGNMENT:]
+        return True
+
+    def close(self):
+        self._arrays = None
+        for name in ('starts', 'lats', 'lons', 'name_offsets', 'countries', 'names'):
+            getattr(self, name).release()
+        self.mapped.close()
+
+    def nearest(self, lat: float, lon: float) -> Optional[int]:
+        cell_size = self.cell_size
+        rows = self.rows
+        columns = self.columns
+        starts = self.starts
+        lats = self.lats
+        lons = self.lons
+
+        row = min(rows - 1, max(0, int((lat + 90.0) / cell_size)))
+        column = int((lon + 180.0) / cell_size) % columns
+
+        # equirectangular distance in degrees of latitude; plenty for ranking
+        # places within a few hundred km
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        limit = self.max_distance_km / KM_PER_DEGREE
+        best = None
+        best_d2 = limit * limit
+        max_ring = min(int(limit / (cell_size * cos_lat)) + 1, columns // 2)
+        # rows farther than the limit in latitude alone are never scanned, which
+        # keeps the wide rings near the poles cheap
+        lat_rings = int(limit / cell_size) + 1
+        first_row = max(0, row - lat_rings)
+        last_row = min(rows - 1, row + lat_rings)
+
+        for ring in range(max_ring + 1):
+            # every place in ring r is at least r - 1 cells away
+            bound = (ring - 1) * cell_size * cos_lat
+            if ring > 1 and bound * bound > best_d2:
+                break
+
+            for r in range(max(first_row, row - ring), min(last_row, row + ring) + 1):
+                edge = r == row - ring or r == row + ring
+                step = 1 if edge or ring == 0 else 2 * ring
+                for c in range(column - ring, column + ring + 1, step):
+                    cell = r * columns + c % columns
+                    for i in range(starts[cell], starts[cell + 1]):
+                        d_lon = lons[i] - lon
+                        if d_lon > 180.0:
+                            d_lon -= 360.0
+                        elif d_lon < -180.0:
+                            d_lon += 360.0
+                        d_lon *= cos_lat
+                        d_lat = lats[i] - lat
+                        d2 = d_lat * d_lat + d_lon * d_lon
+                        if d2 < best_d2:
+                            best = i
+                            best_d2 = d2
+
+        return best
+
+    def nearest_many(self, lats, lons) -> List[Optional[int]]:
+        if numpy is None or not len(lats):
+            return [self.nearest(lat, lon) for lat, lon in zip(lats, lons)]
+
+        q_lat = numpy.asarray(lats, dtype=numpy.float64)
+        q_lon = numpy.asarray(lons, dtype=numpy.float64)
+        nearest = numpy.empty(len(q_lat), dtype=numpy.int64)
+
+        for start in range(0, len(q_lat), self.BATCH_SIZE):
+            stop = start + self.BATCH_SIZE
+            nearest[start:stop] = self._nearest_block(q_lat[start:stop], q_lon[start:stop])
+
+        return [None if i < 0 else i for i in nearest.tolist()]
+
+    def _numpy_arrays(self):
+        if self._arrays is None:
+            self._arrays = tuple(
+                numpy.frombuffer(view, dtype=dtype)
+                for view, dtype in ((self.starts, numpy.uint32), (self.lats, numpy.float32), (self.lons, numpy.float32))
+            )
+        return self._arrays
+
+    def _nearest_block(self, q_lat, q_lon):
+        starts, p_lat, p_lon = self._numpy_arrays()
+
+        cell_size = self.cell_size
+        rows = self.rows
+        columns = self.columns
+        count = len(q_lat)
+        limit = self.max_distance_km / KM_PER_DEGREE
+
+        row = numpy.clip(((q_lat + 90.0) / cell_size).astype(numpy.int64), 0, rows - 1)
+        column = ((q_lon + 180.0) / cell_size).astype(numpy.int64) % columns
+        cos_lat = numpy.maximum(numpy.cos(numpy.radians(q_lat)), 0.01)
+
+        best = numpy.full(count, -1, dtype=numpy.int64)
+        best_d2 = numpy.full(count, limit * limit)
+        query_ids = numpy.arange(count)
+
+        # scan the 3x3 block of cells around every query at once: the places of
+        # each query's cell are laid out as one flat run of candidates
+        for d_row in (-1, 0, 1):
+            r = row + d_row
+            inside = (r >= 0) & (r < rows)
+            for d_column in (-1, 0, 1):
+                cells = numpy.where(inside, r, 0) * columns + (column + d_column) % columns
+                first = starts[cells].astype(numpy.int64)
+                counts = numpy.where(inside, starts[cells + 1].astype(numpy.int64) - first, 0)
+                total = int(counts.sum())
+                if not total:
+                    continue
+
+                owner = numpy.repeat(query_ids, counts)
+                offsets = numpy.cumsum(counts) - counts
+                places = numpy.repeat(first - offsets, counts) + numpy.arange(total)
+
+                d_lon = (p_lon[places] - q_lon[owner] + 180.0) % 360.0 - 180.0
+                d_lon *= cos_lat[owner]
+                d_lat = p_lat[places] - q_lat[owner]
+                d2 = d_lat * d_lat + d_lon * d_lon
+
+                # candidates of one query are contiguous, so reduceat finds each
+                # query's closest one without sorting
+                occupied = counts > 0
+                segments = offsets[occupied]
+                minimum = numpy.minimum.reduceat(d2, segments)
+                positions = numpy.where(d2 == numpy.repeat(minimum, counts[occupied]), numpy.arange(total), total)
+                closest = numpy.minimum.reduceat(positions, segments)
+
+                queries = query_ids[occupied]
+                closer = minimum < best_d2[queries]
+                best[queries[closer]] = places[closest[closer]]
+                best_d2[queries[closer]] = minimum[closer]
+
+        # anything outside the block is at least one cell away; farther or
+        # missing matches take the exact ring search
+        unsettled = numpy.flatnonzero(best_d2 > (cell_size * cos_lat) ** 2)
+        for i in unsettled.tolist():
+            nearest = self.nearest(float(q_lat[i]), float(q_lon[i]))
+            best[i] = -1 if nearest is None else nearest
+
+        return best
+
+    @profiled('ReverseGeocoder.lookup')
+    def lookup(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        key = (lat, lon)
+        if key in self.memo:
+            return self.memo[key]
+
+        place = self.place(self.nearest(lat, lon), lat, lon)
+
+        if len(self.memo) >= self.MEMO_SIZE:
+            self.memo.clear()
+        self.memo[key] = place
+        return place
+
+    @profiled('ReverseGeocoder.lookup_many')
+    def lookup_many(self, coordinates: Iterable[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+        if numpy is None:
+            # nothing to vectorize; repeated points still hit the memo
+            return [self.lookup(lat, lon) for lat, lon in coordinates]
+
+        coordinates = list(coordinates)
+        if not coordinates:
+            return []
+        lats = [lat for lat, _ in coordinates]
+        lons = [lon for _, lon in coordinates]
+        nearest = self.nearest_many(lats, lons)
+
+        found = numpy.array([-1 if i is None else i for i in nearest], dtype=numpy.int64)
+        places = numpy.maximum(found, 0)
+        _, p_lat, p_lon = self._numpy_arrays()
+        distances = numpy.round(self._haversine(
+            numpy.asarray(lats), numpy.asarray(lons), p_lat[places].astype(numpy.float64), p_lon[places].astype(numpy.float64)
+        ), 2).tolist()
+
+        results = []
+        for i, distance in zip(nearest, distances):
+            if i is None:
+                results.append(None)
+            else:
+                name, country = self._names(i)
+                results.append({'place': name, 'country': country, 'distance_km': distance})
+        return results
+
+    @staticmethod
+    def _haversine(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = (numpy.radians(values) for values in (lat1, lon1, lat2, lon2))
+        a = numpy.sin((lat2 - lat1) / 2) ** 2 + numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.minimum(1.0, numpy.sqrt(a)))
+
+    def place(self, i: Optional[int], lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        if i is None:
+            return None
+
+        name, country = self._names(i)
+        return {
+            'place': name,
+            'country': country,
+            'distance_km': round(haversine_km(lat, lon, self.lats[i], self.lons[i]), 2)
+        }
+
+    def _names(self, i: int) -> Tuple[str, str]:
+        names = self.name_cache.get(i)
+        if names is None:
+            names = self.name_cache[i] = (
+                bytes(self.names[self.name_offsets[i]:self.name_offsets[i + 1]]).decode('utf-8', 'replace'),
+                bytes(self.countries[2 * i:2 * i + 2]).decode('ascii').strip()
+            )
+        return names
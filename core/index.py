@@ -0,0 +1,280 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from extractors.record import as_metadata_dict
+from output.writers import to_serializable
+from utils import hash_file
+
+
+DATETIME_PATTERN = re.compile(r'^(\d{4})[:-](\d{2})[:-](\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?')
+
+
+def normalize_datetime(value) -> Optional[str]:
+    # EXIF 'YYYY:MM:DD HH:MM:SS' and PDF 'YYYY-MM-DD HH:MM' become sortable
+    # 'YYYY-MM-DD HH:MM:SS' strings
+    if not isinstance(value, str):
+        return None
+
+    match = DATETIME_PATTERN.match(value.strip())
+    if not match:
+        return None
+
+    year, month, day, hour, minute, second = match.groups()
+    if year == '0000':
+        return None
+    return f"{year}-{month}-{day} {hour or '00'}:{minute or '00'}:{second or '00'}"
+
+
+class MetadataIndex:
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            file_name TEXT,
+            size INTEGER,
+            mtime_ns INTEGER,
+            format TEXT COLLATE NOCASE,
+            make TEXT COLLATE NOCASE,
+            model TEXT COLLATE NOCASE,
+            datetime_original TEXT,
+            latitude REAL,
+            longitude REAL,
+            digest TEXT,
+            metadata TEXT NOT NULL,
+            indexed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS files_make ON files (make, datetime_original);
+        CREATE INDEX IF NOT EXISTS files_model ON files (model, datetime_original);
+        CREATE INDEX IF NOT EXISTS files_datetime ON files (datetime_original);
+        CREATE INDEX IF NOT EXISTS files_digest ON files (digest);
+        CREATE VIRTUAL TABLE IF NOT EXISTS files_geo USING rtree (id, min_lat, max_lat, min_lon, max_lon);
+        CREATE VIRTUAL TABLE IF NOT EXISTS files_text USING fts5 (text);
+    """
+
+    TEXT_SECTIONS = ['camera_info', 'raw_exif', 'pdf_metadata', 'xmp_metadata', 'location']
+    COMMIT_INTERVAL = 1000
+
+    COLUMNS = ['path', 'file_name', 'size', 'format', 'make', 'model', 'datetime_original', 'latitude', 'longitude', 'digest']
+
+    def __init__(self, index_path: str, hash_files: bool = False):
+        self.index_path = Path(index_path)
+        self.hash_files = hash_files
+        self.pending_writes = 0
+        self.added = 0
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.index_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.connection.executescript(self.SCHEMA)
+        except sqlite3.OperationalError as e:
+            self.connection.close()
+            if 'no such module' in str(e):
+                raise sqlite3.OperationalError(
+                    f"this SQLite build lacks the R*Tree or FTS5 extension the index needs ({e})"
+                ) from e
+            raise
+
+    def add(self, file_path: Path, metadata, digest: Optional[str] = None):
+        metadata = as_metadata_dict(metadata)
+        path = os.path.abspath(file_path)
+
+        try:
+            stat = os.stat(path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+
+        if digest is None and self.hash_files:
+            digest = hash_file(path)
+
+        basic = metadata.get('basic_info', {})
+        camera = metadata.get('camera_info', {})
+        settings = metadata.get('settings_info', {})
+        lat, lon = metadata.get('gps_coords', (None, None))
+
+        datetime_original = normalize_datetime(
+            settings.get('DateTimeOriginal') or settings.get('DateTime') or
+            metadata.get('pdf_metadata', {}).get('Creation Date')
+        )
+
+        values = (
+            basic.get('file_name'), size, mtime_ns, basic.get('format'),
+            self._text(camera.get('Make')), self._text(camera.get('Model')),
+            datetime_original, lat, lon, digest,
+            json.dumps(to_serializable(metadata), ensure_ascii=False), time.time()
+        )
+
+        row = self.connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            row_id = self.connection.execute(
+                "INSERT INTO files (file_name, size, mtime_ns, format, make, model, datetime_original, "
+                "latitude, longitude, digest, metadata, indexed, path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values + (path,)
+            ).lastrowid
+        else:
+            row_id = row[0]
+            self.connection.execute(
+                "UPDATE files SET file_name = ?, size = ?, mtime_ns = ?, format = ?, make = ?, model = ?, "
+                "datetime_original = ?, latitude = ?, longitude = ?, digest = ?, metadata = ?, indexed = ? "
+                "WHERE id = ?",
+                values + (row_id,)
+            )
+            self.connection.execute("DELETE FROM files_geo WHERE id = ?", (row_id,))
+            self.connection.execute("DELETE FROM files_text WHERE rowid = ?", (row_id,))
+
+        if lat is not None and lon is not None:
+            self.connection.execute(
+                "INSERT INTO files_geo (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                (row_id, lat, lat, lon, lon)
+            )
+
+        text = self._search_text(path, metadata)
+        if text:
+            self.connection.execute("INSERT INTO files_text (rowid, text) VALUES (?, ?)", (row_id, text))
+
+        self.added += 1
+        self.pending_writes += 1
+        if self.pending_writes >= self.COMMIT_INTERVAL:
+            self.flush()
+
+    def query(
+        self,
+        make: Optional[str] = None,
+        model: Optional[str] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        digest: Optional[str] = None,
+        text: Optional[str] = None,
+        limit: Optional[int] = None,
+        with_metadata: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        sql, params = self._build_query(make, model, after, before, bbox, digest, text, limit, with_metadata)
+        columns = self.COLUMNS + (['metadata'] if with_metadata else [])
+
+        for row in self.connection.execute(sql, params):
+            entry = dict(zip(columns, row))
+            if with_metadata:
+                entry['metadata'] = json.loads(entry['metadata'])
+            yield entry
+
+    def count(self, **filters) -> int:
+        sql, params = self._build_query(**filters, count=True)
+        return self.connection.execute(sql, params).fetchone()[0]
+
+    def _build_query(
+        self,
+        make=None,
+        model=None,
+        after=None,
+        before=None,
+        bbox=None,
+        digest=None,
+        text=None,
+        limit=None,
+        with_metadata=False,
+        count=False
+    ) -> Tuple[str, List[Any]]:
+        joins = []
+        conditions = []
+        params: List[Any] = []
+
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            # the R*Tree keeps 32-bit bounds, so it narrows the candidates and
+            # the stored coordinates decide the edges
+            joins.append("JOIN files_geo ON files_geo.id = files.id")
+            conditions.append("files_geo.max_lat >= ? AND files_geo.min_lat <= ? "
+                              "AND files_geo.max_lon >= ? AND files_geo.min_lon <= ?")
+            conditions.append("files.latitude BETWEEN ? AND ? AND files.longitude BETWEEN ? AND ?")
+            params.extend([min_lat, max_lat, min_lon, max_lon] * 2)
+
+        if text:
+            joins.append("JOIN files_text ON files_text.rowid = files.id")
+            conditions.append("files_text MATCH ?")
+            params.append(text)
+
+        for column, value in (('make', make), ('model', model), ('digest', digest)):
+            if value:
+                conditions.append(f"files.{column} = ?")
+                params.append(value)
+
+        if after:
+            conditions.append("files.datetime_original >= ?")
+            params.append(self._date_bound(after))
+        if before:
+            conditions.append("files.datetime_original <= ?")
+            params.append(self._date_bound(before, end=True))
+
+        if count:
+            select = "SELECT COUNT(*)"
+        else:
+            columns = self.COLUMNS + (['metadata'] if with_metadata else [])
+            select = "SELECT " + ', '.join(f"files.{column}" for column in columns)
+
+        sql = ' '.join([select, "FROM files"] + joins)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if not count:
+            sql += " ORDER BY files.datetime_original, files.path"
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+
+        return sql, params
+
+    @staticmethod
+    def _date_bound(value: str, end: bool = False) -> str:
+        normalized = normalize_datetime(value)
+        if normalized is None:
+            raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)")
+
+        # a bare date as the upper bound includes that whole day
+        if end and len(value.strip()) <= 10:
+            return normalized[:10] + ' 23:59:59'
+        return normalized
+
+    def stats(self) -> Dict[str, Any]:
+        files, with_gps, first, last = self.connection.execute(
+            "SELECT COUNT(*), COUNT(latitude), MIN(datetime_original), MAX(datetime_original) FROM files"
+        ).fetchone()
+        return {'files': files, 'with_gps': with_gps, 'first': first, 'last': last}
+
+    def flush(self):
+        if self.pending_writes:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.connection.execute("PRAGMA optimize")
+        self.connection.close()
+
+    def _search_text(self, path: str, metadata: Dict[str, Any]) -> str:
+        parts = [path]
+        for section in self.TEXT_SECTIONS:
+            for value in metadata.get(section, {}).values():
+                text = self._text(value)
+                if text:
+                    parts.append(text)
+        return ' '.join(parts)
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        if isinstance(value, bytes):
+            value = value.rstrip(b'\x00')
+            if not value or not all(32 <= byte < 127 for byte in value):
+                return None
+            value = value.decode('ascii')
+        if not isinstance(value, str):
+            return None
+        value = value.strip().rstrip('\x00')
+        return value or None
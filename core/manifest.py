@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+class RunManifest:
+
+    VERSION = 1
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = Path(manifest_path)
+        self.previous: Dict[str, Dict[str, Any]] = {}
+        self.current: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.unchanged = 0
+        self.load()
+
+    @classmethod
+    def for_folder(cls, save_dir: str, folder_path: str) -> 'RunManifest':
+        folder = os.path.abspath(folder_path)
+        folder_id = hashlib.sha1(folder.encode('utf-8')).hexdigest()[:12]
+        return cls(Path(save_dir) / f".manifest_{folder_id}.json")
+
+    def load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') == self.VERSION:
+            self.previous = data.get('files', {})
+
+    def check(self, file_path: Path) -> bool:
+        path = os.path.abspath(file_path)
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        previous = self.previous.get(path)
+
+        if previous and previous['size'] == entry['size'] and previous['mtime_ns'] == entry['mtime_ns']:
+            self.current[path] = previous
+            self.unchanged += 1
+            return False
+
+        entry['output'] = previous.get('output') if previous else None
+        self.pending[path] = entry
+        return True
+
+    def previous_output(self, file_path: Path) -> Optional[str]:
+        entry = self.pending.get(os.path.abspath(file_path))
+        return entry.get('output') if entry else None
+
+    def record(self, file_path: Path, output_file: Optional[Path], failed: bool = False):
+        path = os.path.abspath(file_path)
+        if failed:
+            # left pending, so the file is not saved as processed and the
+            # next run tries it again
+            return
+
+        entry = self.pending.pop(path, None)
+        if entry is None:
+            return
+
+        if output_file is not None:
+            entry['output'] = os.path.abspath(output_file)
+        self.current[path] = entry
+
+    def deleted(self) -> List[str]:
+        return sorted(path for path in self._unseen() if not os.path.exists(path))
+
+    def save(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix('.tmp')
+
+        files = {path: self.previous[path] for path in self.pending if path in self.previous}
+        # files this run did not scan, e.g. left out by --include/--exclude/--max-depth,
+        # keep their entries for as long as they exist
+        files.update((path, self.previous[path]) for path in self._unseen() if os.path.exists(path))
+        files.update(self.current)
+
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': files}, f)
+
+        os.replace(temp_path, self.manifest_path)
+
+    def _unseen(self):
+        return (path for path in self.previous if path not in self.current and path not in self.pending)
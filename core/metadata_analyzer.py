@@ -1,15 +1,31 @@
+import os
+import sys
 import time
+from collections import deque
 from pathlib import Path
-
-from PIL import UnidentifiedImageError
+from typing import Dict, Any, Optional
 
 from config import AnalysisConfig
 from core.reader import FileReader
-from core.exif_service import ExifService
-from output import OutputFormatter, FileSaver, ConsoleWriter
+from core.exif_service import ExifService, extract_file
+from extractors import FieldSelection, MetadataRecord, as_metadata_dict
+from parsers import ExifParser
+from utils import Profiler, collect_profile
+from output import FileSaver, ConsoleWriter, ProgressReporter, WRITERS, create_writer
+
+
+def _ignore_stop_signals():
+    # watch mode workers leave Ctrl+C and SIGTERM to the parent, which shuts
+    # the pool down after flushing results
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
 
 
 class MetadataAnalyzer:    
+    # longest a finished file waits for the rest of its geocoding batch
+    GEOCODE_FLUSH_SECONDS = 0.25
+    
     def __init__(self, config: AnalysisConfig):
         self.config = config
         self.reader = FileReader(config.file_path)
@@ -18,76 +34,613 @@ class MetadataAnalyzer:
             quiet_mode=config.quiet_mode,
             typing_enabled=config.typing_enabled
         )
-        self.formatter = OutputFormatter()
+        self._formatter = None
         self.file_saver = FileSaver(config.save_dir)
+        self.cache = None
+        self.writer = None
+        self.progress = None
+        self.dedup = None
+        self.duplicate_of: Dict[Path, Path] = {}
+        # content digests already computed for files not yet reported
+        self.digests: Dict[Path, str] = {}
+        self.index = None
+        self.geocoder = None
+        self.locations: Dict[Path, Dict[str, Any]] = {}
+        self.executor = None
+        self.processed = 0
+        
+        if config.tag_categories_path:
+            ExifParser.load_category_map(config.tag_categories_path)
+        
+        self.fields = FieldSelection(config.fields) if config.fields else None
+        self.prefix_size = config.prefix_read_kb * 1024 if config.prefix_read_kb else None
+        
+        if config.profile:
+            Profiler.enable()
+            Profiler.reset()
+        
+        if config.cache_enabled:
+            from core.cache import MetadataCache
+            self.cache = MetadataCache(
+                config.cache_path,
+                hash_mode=config.cache_hash,
+                max_size_mb=config.cache_size_mb
+            )
+            if config.rebuild_cache:
+                self.cache.clear()
+        
+        if config.geocode_path:
+            from core.geocoder import ReverseGeocoder
+            try:
+                self.geocoder = ReverseGeocoder(config.geocode_path, max_distance_km=config.geocode_radius_km)
+            except (OSError, ValueError) as e:
+                print(f"\nCould not load gazetteer {config.geocode_path}: {e}")
+                sys.exit(1)
+            if self.geocoder.built:
+                print(f"Built geocoding index {self.geocoder.index_path} ({len(self.geocoder)} places)")
+        
+        if config.index_path and self.fields:
+            # a projected record would overwrite the full row of an indexed file
+            print(f"\nNot updating {config.index_path}: --fields only extracts part of the metadata")
+        elif config.index_path:
+            import sqlite3
+            from core.index import MetadataIndex
+            try:
+                self.index = MetadataIndex(config.index_path, hash_files=config.index_hash)
+            except sqlite3.OperationalError as e:
+                print(f"\nCould not open metadata index {config.index_path}: {e}")
+                if self.cache:
+                    self.cache.close()
+                sys.exit(1)
+    
+    @property
+    def formatter(self):
+        if self._formatter is None:
+            from output import OutputFormatter
+            self._formatter = OutputFormatter()
+        return self._formatter
     
     def analyze(self):
-        self._analyze_single_file(Path(self.config.file_path))
+        self._open_writer()
+        try:
+            self._analyze_single_file(Path(self.config.file_path))
+        finally:
+            self._finish_run()
+        self._report_profile()
 
     def analyze_folder(self):
+        try:
+            self._analyze_folder()
+        finally:
+            self._report_profile()
+
+    def _analyze_folder(self):
         folder_path = self.config.folder_path
         if not folder_path:
             print("\nNo folder path provided")
             return
 
-        files = FileReader.get_supported_files(folder_path)
+        scan_options = dict(
+            recursive=self.config.recursive,
+            max_depth=self.config.max_depth,
+            include=self.config.include_patterns,
+            exclude=self.config.exclude_patterns,
+            symlink_policy=self.config.symlink_policy,
+            skip_hidden=self.config.skip_hidden,
+            detect_content=self.config.detect_content
+        )
         
-        if not files:
-            print(f"\nNo supported images found in: {folder_path}")
-            return
+        watcher = None
+        if self.config.watch:
+            if not os.path.isdir(folder_path):
+                print(f"\nFolder not found: {folder_path}")
+                return
+            # the scan and the watcher report the same absolute path form, so
+            # outputs, the cache, the manifest and dedup see one key per file
+            folder_path = os.path.abspath(folder_path)
+            # started before the initial scan so files arriving during it are not missed
+            watcher = FileReader.watch_supported_files(
+                folder_path,
+                settle=self.config.watch_settle,
+                poll_interval=self.config.watch_poll_interval,
+                **scan_options
+            )
+            watcher.start()
             
-        print(f"\nFound {len(files)} images in {folder_path}")
+            workers = self.config.workers or os.cpu_count() or 1
+            if workers > 1:
+                # one warm pool for the whole session instead of one per batch
+                from concurrent.futures import ProcessPoolExecutor
+                self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_stop_signals)
+        
+        files = FileReader.iter_supported_files(folder_path, **scan_options)
+        if watcher is not None:
+            files = watcher.track(files)
+        
+        manifest = None
+        if self.config.incremental:
+            from core.manifest import RunManifest
+            manifest = RunManifest.for_folder(self.config.save_dir, folder_path)
+            files = (file_path for file_path in files if manifest.check(file_path))
+        
+        print(f"\nScanning {folder_path}")
         print("=" * 60)
         
-        for i, file_path in enumerate(files, 1):
-            print(f"\n[{i}/{len(files)}] Processing: {file_path.name}")
-            self._analyze_single_file(file_path)
-            print("-" * 60)
+        self._open_writer()
+        if self.config.progress_only:
+            self.progress = ProgressReporter()
+        
+        if self.config.dedup:
+            from core.dedup import DuplicateIndex
+            self.dedup = DuplicateIndex()
+        
+        gps_batch = None
+        if self.config.gps_summary:
+            from core.geo import GPSBatch
+            gps_batch = GPSBatch()
+        
+        self.processed = 0
+        try:
+            try:
+                if watcher is not None:
+                    self._watch(watcher, files, manifest, gps_batch)
+                else:
+                    self._process_files(files, manifest, gps_batch)
+            finally:
+                if watcher is not None:
+                    watcher.close()
+                if self.executor is not None:
+                    self.executor.shutdown(cancel_futures=True)
+                    self.executor = None
+                if self.progress:
+                    self.progress.finish()
+                    self.progress = None
             
-    def _analyze_single_file(self, file_path: Path):
-        reader = FileReader(str(file_path))
-        is_valid, error_message = reader.validate()
+            # printed before _finish_run closes the geocoder
+            if gps_batch is not None and self.processed:
+                self._print_gps_summary(gps_batch)
+        finally:
+            self._finish_run()
+            if manifest:
+                manifest.save()
         
-        if not is_valid:
-            print(f"\n{error_message}")
+        processed = self.processed
+        if manifest:
+            self._print_incremental_summary(manifest, processed)
             return
         
+        if not processed:
+            print(f"\nNo supported images found in: {folder_path}")
+            return
+        
+        if not self.config.progress_only:
+            print(f"\nProcessed {processed} images in {folder_path}")
+        
+        if self.dedup and self.dedup.duplicates:
+            print(f"{self.dedup.duplicates} files were duplicates of earlier files")
+    
+    def _process_files(self, files, manifest: Optional['RunManifest'] = None, gps_batch: Optional['GPSBatch'] = None):
+        results = self._iter_results(files)
+        if self.geocoder:
+            results = self._geocoded(results)
+        
+        for file_path, metadata, error_message, elapsed in results:
+            self.processed += 1
+            if elapsed is not None:
+                started = time.perf_counter()
+            if gps_batch is not None and metadata is not None:
+                gps_batch.add(file_path, metadata)
+            if not self.progress:
+                print(f"\n[{self.processed}] Processing: {file_path}")
+            previous_output = manifest.previous_output(file_path) if manifest else None
+            duplicate_of = self.duplicate_of.pop(file_path, None)
+            output_file = self._report(file_path, metadata, error_message, previous_output, duplicate_of)
+            if manifest:
+                manifest.record(file_path, output_file, failed=error_message is not None)
+            if elapsed is not None:
+                Profiler.record_file(file_path, elapsed + time.perf_counter() - started)
+            if self.progress:
+                self.progress.update(error=error_message is not None)
+            else:
+                print("-" * 60)
+    
+    def _geocoded(self, results):
+        # nearest places are looked up a batch at a time so lookup_many can
+        # vectorize them; the deadline keeps slow runs reporting as they go
+        batch = []
+        deadline = 0.0
+        for result in results:
+            if not batch:
+                deadline = time.monotonic() + self.GEOCODE_FLUSH_SECONDS
+            batch.append(result)
+            if len(batch) >= self.geocoder.BATCH_SIZE or time.monotonic() >= deadline:
+                self._locate(batch)
+                yield from batch
+                batch = []
+        
+        self._locate(batch)
+        yield from batch
+    
+    def _locate(self, results):
+        points = []
+        for file_path, metadata, error_message, _ in results:
+            if metadata is None or error_message:
+                continue
+            if isinstance(metadata, MetadataRecord):
+                lat, lon = metadata.gps_coords
+            else:
+                lat, lon = metadata.get('gps_coords', (None, None))
+            if lat is not None and lon is not None:
+                points.append((file_path, (lat, lon)))
+        
+        places = self.geocoder.lookup_many(point for _, point in points)
+        for (file_path, _), place in zip(points, places):
+            if place:
+                self.locations[file_path] = place
+    
+    def _watch(self, watcher: 'FolderWatcher', files, manifest: Optional['RunManifest'], gps_batch: Optional['GPSBatch']):
+        import signal
+        
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+        
+        if watcher.fallback_reason:
+            print(f"\ninotify unavailable ({watcher.fallback_reason}), falling back to polling")
+        
+        previous_handler = signal.signal(signal.SIGTERM, stop)
         try:
-            metadata = self.service.extract_metadata(file_path)
-        except FileNotFoundError:
-            print("\nFile not found")
+            self._process_files(files, manifest, gps_batch)
+            print(f"\nWatching {self.config.folder_path} for new files ({watcher.mode}), press Ctrl+C to stop")
+            self._flush_outputs(manifest)
+            
+            for batch in watcher.batches():
+                if manifest:
+                    batch = [file_path for file_path in batch if manifest.check(file_path)]
+                self._process_files(batch, manifest, gps_batch)
+                self._flush_outputs(manifest)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+    
+    def _flush_outputs(self, manifest: Optional['RunManifest'] = None):
+        # everything handed out so far is visible on disk while the watch idles
+        if self.cache:
+            self.cache.flush()
+        if self.index:
+            self.index.flush()
+        if self.writer:
+            self.writer.flush()
+        if manifest:
+            manifest.save()
+        sys.stdout.flush()
+    
+    def _print_incremental_summary(self, manifest: 'RunManifest', processed: int):
+        print(f"\nProcessed {processed} new or modified images, skipped {manifest.unchanged} unchanged")
+        
+        deleted = manifest.deleted()
+        if deleted:
+            print(f"\n{len(deleted)} previously analyzed files no longer exist:")
+            for path in deleted:
+                print(f"  {path}")
+    
+    def _print_gps_summary(self, gps_batch: 'GPSBatch'):
+        summary = gps_batch.summary(self.config.gps_cell_size)
+        
+        self.console_writer.print_section_header("GPS SUMMARY")
+        print(f"Files with GPS                 : {summary['with_gps']}")
+        print(f"Files without GPS              : {summary['without_gps']}")
+        
+        if summary['bbox']:
+            min_lat, min_lon, max_lat, max_lon = summary['bbox']
+            print(f"Bounding Box                   : {min_lat:.6f}, {min_lon:.6f} -> {max_lat:.6f}, {max_lon:.6f}")
+            print(f"Occupied Grid Cells            : {summary['occupied_cells']} ({summary['cell_size']}° cells)")
+            print(f"Clusters                       : {summary['cluster_count']}")
+            
+            for cell in summary['top_cells']:
+                print(f"  cell {cell['lat']:.4f}, {cell['lon']:.4f}      : {cell['count']} files")
+            
+            places = (
+                self.geocoder.lookup_many(cluster['center'] for cluster in summary['clusters'])
+                if self.geocoder else [None] * len(summary['clusters'])
+            )
+            for cluster, place in zip(summary['clusters'], places):
+                lat, lon = cluster['center']
+                near = f" near {place['place']}, {place['country']}" if place else ""
+                print(f"  cluster {lat:.4f}, {lon:.4f}   : {cluster['count']} files in {cluster['cells']} cells{near}")
+        
+        if self.config.gps_export:
+            written = gps_batch.export(self.config.gps_export, self.geocoder)
+            print(f"\n{written} GPS points exported to: {self.config.gps_export}")
+    
+    def _iter_results(self, files):
+        workers = self.config.workers or os.cpu_count() or 1
+        
+        if workers <= 1:
+            for file_path in files:
+                started = time.perf_counter() if Profiler.enabled else None
+                metadata, error_message = self._extract(file_path)
+                elapsed = time.perf_counter() - started if started is not None else None
+                yield file_path, metadata, error_message, elapsed
             return
-        except UnidentifiedImageError:
-            print("\nInvalid or corrupted image")
+        
+        if self.executor is not None:
+            yield from self._iter_pool_results(files, self.executor, workers)
             return
-        except Exception as e:
-            print(f"\nError extracting metadata: {e}")
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from self._iter_pool_results(files, executor, workers)
+    
+    def _iter_pool_results(self, files, executor: 'Executor', workers: int):
+        from concurrent.futures import Future, wait, FIRST_COMPLETED
+        
+        pending = iter(files)
+        max_in_flight = workers * 4
+        
+        in_flight = deque()
+        # extracting file -> futures of its duplicates, resolved once its result arrives
+        waiters: Dict[Path, list] = {}
+        
+        def submit_next():
+            file_path = next(pending, None)
+            if file_path is None:
+                return False
+            
+            original = self._check_duplicate(file_path)
+            reused = self._reused(file_path, original)
+            if reused is not None:
+                future = Future()
+                future.set_result(reused)
+            elif original in waiters:
+                future = Future()
+                waiters[original].append(future)
+                reused = True
+            elif Profiler.enabled:
+                future = executor.submit(
+                    collect_profile, extract_file, file_path, True, self.fields, self.prefix_size
+                )
+            else:
+                future = executor.submit(extract_file, file_path, True, self.fields, self.prefix_size)
+            
+            if self.dedup and reused is None:
+                waiters[file_path] = []
+            
+            in_flight.append((file_path, future, reused is not None))
+            return True
+        
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+        
+        while in_flight:
+            if self.config.ordered_results:
+                file_path, future, reused = in_flight.popleft()
+            else:
+                wait([f for _, f, _ in in_flight], return_when=FIRST_COMPLETED)
+                index = next(i for i, (_, f, _) in enumerate(in_flight) if f.done())
+                file_path, future, reused = in_flight[index]
+                del in_flight[index]
+            
+            result = future.result()
+            elapsed = None
+            if Profiler.enabled:
+                if reused:
+                    elapsed = 0.0
+                else:
+                    # stage timings were collected inside the worker process
+                    result, elapsed, snapshot = result
+                    Profiler.merge(snapshot)
+            
+            metadata, error_message = result
+            if not reused:
+                self._store(file_path, metadata)
+                self._remember(file_path, result)
+            for waiter in waiters.pop(file_path, ()):
+                waiter.set_result(result)
+            
+            yield file_path, metadata, error_message, elapsed
+            submit_next()
+    
+    def _extract(self, file_path: Path):
+        reused = self._reused(file_path, self._check_duplicate(file_path))
+        if reused is not None:
+            return reused
+        
+        metadata, error_message = extract_file(
+            file_path,
+            record=True,
+            fields=self.fields,
+            prefix_size=self.prefix_size
+        )
+        self._store(file_path, metadata)
+        self._remember(file_path, (metadata, error_message))
+        
+        return metadata, error_message
+    
+    def _check_duplicate(self, file_path: Path) -> Optional[Path]:
+        if not self.dedup:
+            return None
+        
+        original, digest = self.dedup.check(file_path)
+        if digest is not None:
+            self.digests[file_path] = digest
+        if original is not None:
+            self.duplicate_of[file_path] = original
+        return original
+    
+    def _reused(self, file_path: Path, original: Optional[Path]):
+        if original is not None:
+            # an evicted result falls through to the cache or a fresh extraction
+            result = self.dedup.result(original)
+            if result is not None:
+                return result
+        
+        cached = self._cached(file_path)
+        if cached is not None:
+            result = (cached, None)
+            self._remember(file_path, result)
+            return result
+        return None
+    
+    def _remember(self, file_path: Path, result):
+        if self.dedup and file_path not in self.duplicate_of:
+            self.dedup.remember(file_path, result)
+    
+    def _cached(self, file_path: Path):
+        if not self.cache:
+            return None
+        
+        cached, digest = self.cache.get(file_path)
+        if digest is not None:
+            self.digests[file_path] = digest
+        if cached is not None and self.fields:
+            return self.fields.apply(cached)
+        return cached
+    
+    def _store(self, file_path: Path, metadata):
+        # projected records are incomplete, so only full extractions are cached
+        if self.cache and metadata is not None and not self.fields:
+            self.cache.put(file_path, metadata, self.digests.get(file_path))
+    
+    def _open_writer(self):
+        output_format = self.config.output_format
+        if not self.config.save_enabled:
+            return
+        if output_format == 'text' and not self.config.single_file:
             return
         
-        self.console_writer.print_metadata(metadata)
+        output_path = self.config.custom_output or self.file_saver.generate_run_filename(
+            WRITERS[output_format].EXTENSION
+        )
+        max_bytes = self.config.rotate_size_mb * 1024 * 1024 if self.config.rotate_size_mb else None
+        
+        self.writer = create_writer(
+            output_format,
+            output_path,
+            max_bytes=max_bytes,
+            fsync_every=self.config.fsync_every
+        )
+    
+    def _finish_run(self):
+        try:
+            if self.geocoder:
+                self.geocoder.close()
+                self.geocoder = None
+            
+            if self.index:
+                self.index.flush()
+                print(f"\n{self.index.added} files indexed in: {self.config.index_path}")
+            
+            if self.writer:
+                self.writer.close()
+                output_files = ', '.join(str(path) for path in self.writer.output_files)
+                print(f"\n{self.writer.records} records saved to: {output_files}")
+                self.writer = None
+        finally:
+            # close() runs PRAGMA optimize and checkpoints the WAL
+            if self.cache:
+                self.cache.close()
+                self.cache = None
+            if self.index:
+                self.index.close()
+                self.index = None
+    
+    def _analyze_single_file(self, file_path: Path):
+        started = time.perf_counter()
+        metadata, error_message = self._extract(file_path)
+        if self.geocoder:
+            self._locate([(file_path, metadata, error_message, None)])
+        self._report(file_path, metadata, error_message)
+        if Profiler.enabled:
+            Profiler.record_file(file_path, time.perf_counter() - started)
+    
+    def _report_profile(self):
+        if not self.config.profile:
+            return
+        
+        Profiler.print_summary()
+        if self.config.profile_json:
+            Profiler.dump_json(self.config.profile_json)
+            print(f"\nProfile saved to: {self.config.profile_json}")
+    
+    def _report(
+        self,
+        file_path: Path,
+        metadata: Optional[Dict[str, Any]],
+        error_message: Optional[str],
+        previous_output: Optional[str] = None,
+        duplicate_of: Optional[Path] = None
+    ) -> Optional[Path]:
+        digest = self.digests.pop(file_path, None)
+        location = self.locations.pop(file_path, None)
+        record = metadata
+        if (location or self.index) and metadata is not None and not error_message:
+            metadata = as_metadata_dict(metadata)
+            if location:
+                metadata = {**metadata, 'location': location}
+            if self.index:
+                self.index.add(file_path, metadata, digest)
+        
+        if duplicate_of is not None:
+            # the first copy was already reported in full; structured outputs
+            # still get one record per file
+            if not self.progress:
+                print(f"\nDuplicate of: {duplicate_of}")
+            if self.writer:
+                self.writer.write(file_path, record, error_message, duplicate_of=duplicate_of, location=location)
+                return self.writer.output_path
+            return None
+        
+        if error_message:
+            if not self.progress:
+                print(f"\n{error_message}")
+            if self.writer:
+                self.writer.write(file_path, None, error_message)
+            return None
+        
+        metadata = as_metadata_dict(metadata)
+        
+        if not self.progress:
+            self.console_writer.print_metadata(metadata)
+        
+        if self.writer:
+            self.writer.write(file_path, record, location=location)
+            return self.writer.output_path
         
         if self.config.save_enabled:
-            self._save_results(metadata, file_path)
+            return self._save_results(metadata, file_path, previous_output)
+        return None
     
-    def _save_results(self, metadata: dict, file_path: Path):
-        print()
+    def _save_results(self, metadata: dict, file_path: Path, previous_output: Optional[str] = None) -> Optional[Path]:
+        if not self.progress:
+            print()
+        
+        output_lines = ConsoleWriter.render_lines(metadata)
         
         if self.config.custom_output:
             output_file = self.file_saver.save_to_custom_path(
-                self.formatter.get_output_lines(),
+                output_lines,
                 self.config.custom_output
             )
+        elif previous_output:
+            output_file = self.file_saver.save_to_custom_path(
+                output_lines,
+                previous_output
+            )
         else:
             output_file = self.file_saver.save(
-                self.formatter.get_output_lines(),
+                output_lines,
                 file_path.name
             )
         
-        if output_file:
+        if output_file and not self.progress:
             if self.config.typing_enabled:
                 self._print_slow(f"Results saved to: {output_file}", 0.02)
             else:
                 print(f"Results saved to: {output_file}")
+        
+        return output_file
     
     def _print_slow(self, text: str, delay: float):
         for char in text:
@@ -1,25 +1,35 @@
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Iterator
+
+from core.scanner import DirectoryScanner
+from extractors import ExtractorRegistry
+from utils import profiled
 
 
 class FileReader:
     
-    SUPPORTED_FORMATS = ['.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.gif']
+    SUPPORTED_FORMATS = ExtractorRegistry.known_extensions()
     
     def __init__(self, file_path: str):
         self.file_path = Path(file_path)
     
+    @profiled('FileReader.validate')
     def validate(self) -> Tuple[bool, Optional[str]]:
         if not self.file_path.exists():
             return False, f"File not found: {self.file_path}"
         
-        if not self.is_supported_format():
-            ext = self.file_path.suffix.lower()
-            supported = ', '.join(self.SUPPORTED_FORMATS)
-            return False, f"Unsupported file type: {ext}\nSupported formats: {supported}"
+        # the content itself is checked by the one prefix read that extraction
+        # does anyway, instead of opening the file here first
+        if not self.is_supported_format() and not self.file_path.is_file():
+            return False, self.unsupported_message()
         
         return True, None
     
+    def unsupported_message(self) -> str:
+        ext = self.file_path.suffix.lower()
+        supported = ', '.join(self.SUPPORTED_FORMATS)
+        return f"Unsupported file type: {ext}\nSupported formats: {supported}"
+    
     def is_supported_format(self) -> bool:
         return self.file_path.suffix.lower() in self.SUPPORTED_FORMATS
     
@@ -33,13 +43,39 @@ class FileReader:
 
     @classmethod
     def get_supported_files(cls, folder_path: str) -> list[Path]:
-        path = Path(folder_path)
-        if not path.exists() or not path.is_dir():
-            return []
-            
-        files = []
-        for file_path in path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in cls.SUPPORTED_FORMATS:
-                files.append(file_path)
+        return sorted(cls.iter_supported_files(folder_path))
+    
+    @classmethod
+    def iter_supported_files(cls, folder_path: str, detect_content: bool = False, **scan_options) -> Iterator[Path]:
+        scanner = DirectoryScanner(None if detect_content else cls.SUPPORTED_FORMATS, **scan_options)
+        files = scanner.scan(folder_path)
         
-        return sorted(files)
+        if detect_content:
+            return cls._detect_supported(files)
+        return files
+    
+    @classmethod
+    def watch_supported_files(
+        cls,
+        folder_path: str,
+        detect_content: bool = False,
+        settle: float = 1.0,
+        poll_interval: Optional[float] = None,
+        **scan_options
+    ) -> 'FolderWatcher':
+        from core.watcher import FolderWatcher
+        
+        scanner = DirectoryScanner(None if detect_content else cls.SUPPORTED_FORMATS, **scan_options)
+        return FolderWatcher(
+            folder_path,
+            scanner,
+            settle=settle,
+            poll_interval=poll_interval,
+            accept=cls._detect_supported if detect_content else None
+        )
+    
+    @classmethod
+    def _detect_supported(cls, files: Iterator[Path]) -> Iterator[Path]:
+        for file_path in files:
+            if file_path.suffix.lower() in cls.SUPPORTED_FORMATS or ExtractorRegistry.detect_file(file_path):
+                yield file_path
@@ -0,0 +1,136 @@
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, Iterable, Optional
+
+
+class DirectoryScanner:
+
+    SYMLINK_POLICIES = ['skip', 'files', 'follow']
+
+    def __init__(
+        self,
+        extensions: Optional[Iterable[str]],
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        symlink_policy: str = 'files',
+        skip_hidden: bool = False
+    ):
+        if symlink_policy not in self.SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {symlink_policy}")
+
+        self.extensions = tuple(ext.lower() for ext in extensions) if extensions is not None else None
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.symlink_policy = symlink_policy
+        self.skip_hidden = skip_hidden
+
+    def scan(self, folder_path: str) -> Iterator[Path]:
+        root = os.fspath(folder_path)
+        if not os.path.isdir(root):
+            return
+
+        visited = set()
+        stack = [(root, '', 0)]
+
+        while stack:
+            directory, prefix, depth = stack.pop()
+
+            if self.symlink_policy == 'follow':
+                try:
+                    stat = os.stat(directory)
+                except OSError:
+                    continue
+                key = (stat.st_dev, stat.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+
+            subdirectories = []
+
+            with entries:
+                for entry in entries:
+                    if self.skip_hidden and entry.name.startswith('.'):
+                        continue
+
+                    relative = prefix + entry.name
+
+                    if self._is_excluded(entry.name, relative):
+                        continue
+
+                    try:
+                        is_symlink = entry.is_symlink()
+
+                        if is_symlink and self.symlink_policy == 'skip':
+                            continue
+
+                        if entry.is_dir(follow_symlinks=self.symlink_policy == 'follow'):
+                            if self._can_descend(depth):
+                                subdirectories.append((entry.path, relative + '/'))
+                            continue
+
+                        if not entry.is_file(follow_symlinks=self.symlink_policy != 'skip'):
+                            continue
+                    except OSError:
+                        continue
+
+                    if self._matches(entry.name, relative):
+                        yield Path(entry.path)
+
+            for subdirectory, relative in reversed(subdirectories):
+                stack.append((subdirectory, relative, depth + 1))
+
+    def accepts_directory(self, relative: str) -> bool:
+        # relative is '/'-separated from the scanned root, '' for the root itself
+        if not relative:
+            return True
+
+        parts = relative.split('/')
+        if not self._can_descend(len(parts) - 1):
+            return False
+        return all(self._is_visible(name, '/'.join(parts[:i + 1])) for i, name in enumerate(parts))
+
+    def accepts_file(self, relative: str) -> bool:
+        directory, _, name = relative.rpartition('/')
+        return (
+            self.accepts_directory(directory) and
+            self._is_visible(name, relative) and
+            self._matches(name, relative)
+        )
+
+    def _is_visible(self, name: str, relative: str) -> bool:
+        if self.skip_hidden and name.startswith('.'):
+            return False
+        return not self._is_excluded(name, relative)
+
+    def _can_descend(self, depth: int) -> bool:
+        if not self.recursive:
+            return False
+        return self.max_depth is None or depth < self.max_depth
+
+    def _is_excluded(self, name: str, relative: str) -> bool:
+        return any(
+            fnmatch(name, pattern) or fnmatch(relative, pattern)
+            for pattern in self.exclude
+        )
+
+    def _matches(self, name: str, relative: str) -> bool:
+        if self.extensions is not None and not name.lower().endswith(self.extensions):
+            return False
+
+        if not self.include:
+            return True
+
+        return any(
+            fnmatch(name, pattern) or fnmatch(relative, pattern)
+            for pattern in self.include
+        )
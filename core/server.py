@@ -0,0 +1,353 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core.exif_service import extract_file
+from extractors import ExtractorRegistry, FieldSelection
+from output.writers import json_record
+
+
+def _warm_up():
+    from PIL import Image
+    Image.init()
+    ExtractorRegistry.preload()
+
+
+def _init_worker():
+    # the server process handles Ctrl+C and SIGTERM and shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    _warm_up()
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+@lru_cache(maxsize=64)
+def _selection(fields: Tuple[str, ...]) -> Optional[FieldSelection]:
+    return FieldSelection(fields) if fields else None
+
+
+def extract_json(
+    path: str,
+    fields: Tuple[str, ...] = (),
+    prefix_size: Optional[int] = None,
+    target: Optional[str] = None
+) -> str:
+    # runs in a worker, so the server threads only join finished JSON strings
+    metadata, error_message = extract_file(Path(target or path), True, _selection(fields), prefix_size)
+    return json.dumps(json_record(path, metadata, error_message), ensure_ascii=False)
+
+
+class ServiceOverloaded(Exception):
+    pass
+
+
+class ExtractionService:
+
+    MAX_BATCH = 1000
+    PENDING_PER_WORKER = 64
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        fields: Iterable[str] = (),
+        prefix_size: Optional[int] = None,
+        allowed_dirs: Iterable[str] = ()
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * self.PENDING_PER_WORKER
+        self.fields = tuple(fields)
+        self.prefix_size = prefix_size
+        self.allowed_dirs = [os.path.realpath(directory) for directory in allowed_dirs]
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.served = 0
+        self.restarts = 0
+
+    @property
+    def batch_limit(self) -> int:
+        return min(self.MAX_BATCH, self.max_pending)
+
+    def start(self):
+        # imported once here so forked workers start warm; all of them are
+        # running before the first request arrives
+        _warm_up()
+        self.executor = self._create_pool()
+        list(self.executor.map(_worker_pid, range(self.workers)))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'served': self.served,
+            'restarts': self.restarts
+        }
+
+    def extract(self, paths: List[str], fields: Optional[Tuple[str, ...]] = None) -> List[str]:
+        fields = self.fields if fields is None else fields
+
+        with self.lock:
+            if self.pending + len(paths) > self.max_pending:
+                raise ServiceOverloaded(
+                    f"{self.pending} files pending, limit is {self.max_pending}; retry later"
+                )
+            self.pending += len(paths)
+            executor = self.executor
+
+        results: List[Optional[str]] = [None] * len(paths)
+        futures = []
+        crashed = False
+        try:
+            for i, path in enumerate(paths):
+                target, error_message = self._resolve(path)
+                if error_message:
+                    results[i] = json.dumps(json_record(path, None, error_message), ensure_ascii=False)
+                    continue
+                try:
+                    futures.append((i, path, executor.submit(extract_json, path, fields, self.prefix_size, target)))
+                except BrokenProcessPool:
+                    crashed = True
+                    results[i] = json.dumps(json_record(path, None, "Worker process crashed"))
+
+            for i, path, future in futures:
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    crashed = True
+                    results[i] = json.dumps(json_record(path, None, "Worker process crashed"))
+        finally:
+            with self.lock:
+                self.pending -= len(paths)
+                self.served += len(paths)
+
+        if crashed:
+            self._restart(executor)
+        return results
+
+    def _resolve(self, path) -> Tuple[Optional[str], Optional[str]]:
+        if not isinstance(path, str) or not os.path.isabs(path):
+            return None, "Path must be an absolute path string"
+        if not self.allowed_dirs:
+            return None, None
+
+        # extract the resolved file, so a symlink swapped in later cannot escape
+        real_path = os.path.realpath(path)
+        if not any(real_path == root or real_path.startswith(root + os.sep) for root in self.allowed_dirs):
+            return None, "Path is outside the allowed directories"
+        return real_path, None
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = self._create_pool()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # buffered, so headers and body leave in one write instead of stalling
+    # on Nagle's algorithm and delayed ACKs between them
+    wbufsize = -1
+    MAX_BODY_BYTES = 1024 * 1024
+    LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not self._check_host():
+            return
+
+        if url.path == '/health':
+            self._send_json(HTTPStatus.OK, json.dumps(self.server.service.status()))
+        elif url.path == '/extract':
+            query = parse_qs(url.query)
+            paths = query.get('path', [])
+            if not paths:
+                self._send_error(HTTPStatus.BAD_REQUEST, "Missing path parameter")
+                return
+            fields = query.get('fields')
+            self._extract(paths, len(paths) == 1, self._fields(fields[0]) if fields else None)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if not self._check_host():
+            return
+        if url.path != '/extract':
+            self.close_connection = True
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > self.MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body must be at most {self.MAX_BODY_BYTES} bytes")
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send_error(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+            return
+
+        if not isinstance(request, dict) or ('path' in request) == ('paths' in request):
+            self._send_error(HTTPStatus.BAD_REQUEST, 'Expected {"path": ...} or {"paths": [...]}')
+            return
+
+        single = 'path' in request
+        paths = [request['path']] if single else request['paths']
+        if not isinstance(paths, list):
+            self._send_error(HTTPStatus.BAD_REQUEST, '"paths" must be a list')
+            return
+
+        fields = request.get('fields')
+        self._extract(paths, single, self._fields(fields) if fields is not None else None)
+
+    def _extract(self, paths: list, single: bool, fields: Optional[Tuple[str, ...]]):
+        service = self.server.service
+        if len(paths) > service.batch_limit:
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Batches are limited to {service.batch_limit} paths")
+            return
+
+        try:
+            results = service.extract(paths, fields)
+        except ServiceOverloaded as e:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), [('Retry-After', '1')])
+            return
+
+        body = results[0] if single else '{"results": [' + ', '.join(results) + ']}'
+        self._send_json(HTTPStatus.OK, body)
+
+    @staticmethod
+    def _fields(fields) -> Tuple[str, ...]:
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        if not isinstance(fields, list):
+            return ()
+        return tuple(name.strip() for name in fields if isinstance(name, str) and name.strip())
+
+    def _check_host(self) -> bool:
+        # a loopback server only answers requests addressed to loopback names,
+        # so a web page cannot reach it through DNS rebinding
+        if not self.server.local_only:
+            return True
+
+        host = self.headers.get('Host', '')
+        if host.startswith('['):
+            host = host[1:].partition(']')[0]
+        else:
+            host = host.partition(':')[0]
+
+        if host in self.LOCAL_HOSTS:
+            return True
+        self.close_connection = True
+        self._send_error(HTTPStatus.FORBIDDEN, f"Host not allowed: {host}")
+        return False
+
+    def _send_error(self, status: HTTPStatus, message: str, headers=()):
+        self._send_json(status, json.dumps({'error': message}), headers)
+
+    def _send_json(self, status: HTTPStatus, body: str, headers=()):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+
+    request_queue_size = 128
+
+    def __init__(self, host: str, port: int, service: ExtractionService):
+        self.address_family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        self.service = service
+        self.local_only = host in ExtractionRequestHandler.LOCAL_HOSTS
+        super().__init__((host, port), ExtractionRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{f'[{host}]' if ':' in host else host}:{port}"
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str, service: ExtractionService, mode: int = 0o660):
+        self.socket_path = socket_path
+        self.service = service
+        self.local_only = False
+        self._remove_stale_socket()
+        super().__init__(socket_path, ExtractionRequestHandler)
+        os.chmod(socket_path, mode)
+
+    @property
+    def url(self) -> str:
+        return f"unix:{self.socket_path}"
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+    def _remove_stale_socket(self):
+        try:
+            if not stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+                raise OSError(f"{self.socket_path} exists and is not a socket")
+        except FileNotFoundError:
+            return
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except ConnectionRefusedError:
+            os.unlink(self.socket_path)
+            return
+        except OSError:
+            return
+        finally:
+            probe.close()
+        raise OSError(f"Another server is already listening on {self.socket_path}")
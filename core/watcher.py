@@ -0,0 +1,355 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.scanner import DirectoryScanner
+
+
+class InotifyWatch:
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MOVE_SELF | IN_ONLYDIR
+    EVENT = struct.Struct('iIII')
+    READ_SIZE = 256 * 1024
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        self.directories: Dict[int, str] = {}
+
+    def add(self, directory: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            self._raise(directory)
+        self.directories[wd] = directory
+
+    def read(self, timeout: Optional[float]) -> Optional[List[Tuple[str, int]]]:
+        # (path, mask) events, or None when the kernel queue overflowed
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, self.READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        overflowed = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\x00')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                overflowed = True
+                continue
+
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                del self.directories[wd]
+                continue
+            if mask & self.IN_MOVE_SELF:
+                # a directory moved away keeps its watch, but not its path
+                self.libc.inotify_rm_watch(self.fd, wd)
+                continue
+
+            events.append((os.path.join(directory, os.fsdecode(name)), mask))
+
+        return None if overflowed else events
+
+    def close(self):
+        os.close(self.fd)
+
+    @staticmethod
+    def _raise(path: Optional[str] = None):
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+
+class FolderWatcher:
+
+    # a file is handed out once it was closed after writing (or renamed into
+    # place) and its size and mtime then stayed the same for the settle delay
+    SETTLE_SECONDS = 1.0
+    POLL_INTERVAL = 2.0
+    # slack for filesystem timestamp granularity when catching up after a
+    # dropped inotify queue
+    RESCAN_MARGIN_NS = 2 * 10**9
+
+    def __init__(
+        self,
+        folder_path: str,
+        scanner: DirectoryScanner,
+        settle: float = SETTLE_SECONDS,
+        poll_interval: Optional[float] = None,
+        accept: Optional[Callable[[Iterable[Path]], Iterable[Path]]] = None
+    ):
+        self.root = os.path.abspath(folder_path)
+        self.scanner = scanner
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.accept = accept
+        self.inotify: Optional[InotifyWatch] = None
+        self.fallback_reason: Optional[str] = None
+        # path -> (deadline, size, mtime_ns) of files waiting for writes to settle
+        self.pending: Dict[str, Tuple[float, int, int]] = {}
+        # path -> (size, mtime_ns) at the last poll
+        self.known: Dict[str, Tuple[int, int]] = {}
+        # path -> (size, mtime_ns) of files the initial scan handed out after
+        # the watch was armed; their own events are not handed out again
+        self.scanned: Dict[str, Tuple[int, int]] = {}
+        self.next_poll = 0.0
+        self.last_read_ns = 0
+        self.started_ns = 0
+
+    @property
+    def mode(self) -> str:
+        if self.inotify is not None:
+            return f"inotify, {len(self.inotify.directories)} directories"
+        return f"polling every {self.poll_interval:g}s"
+
+    def start(self):
+        self.started_ns = time.time_ns()
+        if self.poll_interval is None:
+            try:
+                self.inotify = InotifyWatch()
+                self.last_read_ns = time.time_ns()
+                self._add_tree(self.root)
+                return
+            except OSError as e:
+                self._fall_back(e)
+                return
+
+        self.known = self._snapshot()
+        self.next_poll = time.monotonic() + self.poll_interval
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def track(self, files: Iterable[Path]) -> Iterator[Path]:
+        # wraps the initial scan of a started watcher
+        since_ns = self.started_ns - self.RESCAN_MARGIN_NS
+        for file_path in files:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                yield file_path
+                continue
+            if stat.st_ctime_ns >= since_ns:
+                self.scanned[os.path.abspath(file_path)] = (stat.st_size, stat.st_mtime_ns)
+            yield file_path
+
+    def batches(self) -> Iterator[List[Path]]:
+        while True:
+            timeout = self._timeout()
+
+            if self.inotify is not None:
+                started_ns = time.time_ns()
+                events = self.inotify.read(timeout)
+                if events is None:
+                    self._rescan(self.last_read_ns - self.RESCAN_MARGIN_NS)
+                else:
+                    for path, mask in events:
+                        self._handle(path, mask)
+                self.last_read_ns = started_ns
+            else:
+                if timeout:
+                    time.sleep(timeout)
+                if time.monotonic() >= self.next_poll:
+                    self._poll()
+
+            ready = self._ready()
+            if ready:
+                yield ready
+
+    def _timeout(self) -> Optional[float]:
+        deadlines = [deadline for deadline, _, _ in self.pending.values()]
+        if self.inotify is None:
+            deadlines.append(self.next_poll)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _handle(self, path: str, mask: int):
+        if mask & InotifyWatch.IN_ISDIR:
+            if mask & (InotifyWatch.IN_CREATE | InotifyWatch.IN_MOVED_TO) and self.inotify is not None:
+                if self.scanner.accepts_directory(self._relative(path)):
+                    # files can land in a new directory before its watch exists
+                    try:
+                        self._add_tree(path, since_ns=0)
+                    except OSError as e:
+                        self._fall_back(e, since_ns=self.last_read_ns - self.RESCAN_MARGIN_NS)
+            return
+
+        if mask & (InotifyWatch.IN_CLOSE_WRITE | InotifyWatch.IN_MOVED_TO):
+            if self.scanner.symlink_policy == 'skip' and os.path.islink(path):
+                return
+            if self.scanner.accepts_file(self._relative(path)):
+                self._touch(path)
+        elif mask & InotifyWatch.IN_MODIFY and path in self.pending:
+            self._touch(path)
+
+    def _add_tree(self, directory: str, since_ns: Optional[int] = None):
+        # watches directory and its accepted subdirectories; with since_ns, files
+        # changed at or after it are queued too
+        follow = self.scanner.symlink_policy == 'follow'
+        visited = set()
+        stack = [directory]
+
+        while stack:
+            current = stack.pop()
+            try:
+                stat = os.stat(current)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) in visited:
+                continue
+            visited.add((stat.st_dev, stat.st_ino))
+
+            try:
+                self.inotify.add(current)
+            except FileNotFoundError:
+                continue
+
+            try:
+                entries = os.scandir(current)
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink() and self.scanner.symlink_policy == 'skip':
+                            continue
+                        if entry.is_dir(follow_symlinks=follow):
+                            if self.scanner.accepts_directory(self._relative(entry.path)):
+                                stack.append(entry.path)
+                            continue
+                        if since_ns is None or not entry.is_file():
+                            continue
+                        if entry.stat().st_ctime_ns < since_ns:
+                            continue
+                    except OSError:
+                        continue
+
+                    if self.scanner.accepts_file(self._relative(entry.path)):
+                        self._touch(entry.path)
+
+    def _rescan(self, since_ns: int):
+        # events were dropped; queue whatever changed since the last good read
+        try:
+            self._add_tree(self.root, since_ns=since_ns)
+        except OSError as e:
+            self._fall_back(e, since_ns=since_ns)
+
+    def _fall_back(self, error: OSError, since_ns: Optional[int] = None):
+        self.close()
+        self.fallback_reason = str(error)
+        self.poll_interval = self.POLL_INTERVAL
+        self.known = self._snapshot()
+        self.next_poll = time.monotonic() + self.poll_interval
+
+        if since_ns is not None:
+            # switching mid-run: files changed since the last good read were
+            # not handed out yet
+            for path in self.known:
+                try:
+                    if os.stat(path).st_ctime_ns >= since_ns:
+                        self._touch(path)
+                except OSError:
+                    continue
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for file_path in self.scanner.scan(self.root):
+            path = str(file_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _poll(self):
+        snapshot = self._snapshot()
+        now = time.monotonic()
+        for path, state in snapshot.items():
+            if self.known.get(path) != state:
+                self.pending[path] = (now + self.settle,) + state
+        self.known = snapshot
+        self.next_poll = now + self.poll_interval
+
+    def _touch(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        self.pending[path] = (time.monotonic() + self.settle, stat.st_size, stat.st_mtime_ns)
+
+    def _ready(self) -> List[Path]:
+        now = time.monotonic()
+        ready = []
+
+        for path, (deadline, size, mtime_ns) in list(self.pending.items()):
+            if deadline > now:
+                continue
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                # still being written
+                self.pending[path] = (now + self.settle, stat.st_size, stat.st_mtime_ns)
+                continue
+
+            del self.pending[path]
+            if self.scanned.pop(path, None) == (size, mtime_ns):
+                # created while the initial scan ran, which already handled it
+                continue
+            ready.append(Path(path))
+
+        ready.sort()
+        if self.accept is not None:
+            ready = list(self.accept(ready))
+        return ready
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
@@ -1,3 +1,30 @@
-from .image_extractor import ImageExtractor
+import importlib
 
-__all__ = ['ImageExtractor']
+_EXPORTS = {
+    'ExifReader': '.exif_reader',
+    'ImageExtractor': '.image_extractor',
+    'PDFExtractor': '.pdf_extractor',
+    'ExtractorRegistry': '.registry',
+    'UnsupportedFormatError': '.registry',
+    'MetadataRecord': '.record',
+    'as_metadata_dict': '.record',
+    'with_file_name': '.record',
+    'FieldSelection': '.fields',
+    'PrefixReader': '.prefix_reader',
+}
+
+__all__ = ['ExifReader', 'ImageExtractor', 'PDFExtractor', 'ExtractorRegistry', 'UnsupportedFormatError',
+           'MetadataRecord', 'as_metadata_dict', 'with_file_name', 'FieldSelection',
+           'PrefixReader']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
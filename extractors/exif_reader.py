@@ -0,0 +1,354 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from PIL.TiffImagePlugin import IFDRational
+
+from utils import profiled
+
+
+class ExifReader:
+
+    EXIF_IFD = 0x8769
+    GPS_IFD = 0x8825
+
+    JPEG_SOF_MARKERS = {
+        0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+        0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+    }
+
+    JPEG_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+    PNG_MODES = {
+        (1, 0): '1', (2, 0): 'L', (4, 0): 'L', (8, 0): 'L', (16, 0): 'I;16',
+        (8, 2): 'RGB', (16, 2): 'RGB',
+        (1, 3): 'P', (2, 3): 'P', (4, 3): 'P', (8, 3): 'P',
+        (8, 4): 'LA', (16, 4): 'RGBA',
+        (8, 6): 'RGBA', (16, 6): 'RGBA'
+    }
+
+    TIFF_MODES = {
+        (0, 1, 1): '1', (1, 1, 1): '1',
+        (0, 1, 8): 'L', (1, 1, 8): 'L',
+        (1, 1, 16): 'I;16',
+        (2, 3, 8): 'RGB', (2, 4, 8): 'RGBA',
+        (2, 3, 16): 'RGB', (2, 4, 16): 'RGBA',
+        (3, 1, 1): 'P', (3, 1, 2): 'P', (3, 1, 4): 'P', (3, 1, 8): 'P',
+        (5, 4, 8): 'CMYK', (5, 4, 16): 'CMYK',
+        (6, 3, 8): 'YCbCr'
+    }
+
+    # TIFF field type -> (struct code, size in bytes)
+    FIELD_TYPES = {
+        1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('L', 4),
+        5: ('L', 8), 6: ('b', 1), 7: ('s', 1), 8: ('h', 2),
+        9: ('l', 4), 10: ('l', 8), 11: ('f', 4), 12: ('d', 8),
+        13: ('L', 4)
+    }
+
+    # IFD0 tags needed to work out TIFF dimensions and mode
+    TIFF_IMAGE_TAGS = (0x0100, 0x0101, 0x0102, 0x0106, 0x0115)
+
+    # TIFFs at least this large are memory-mapped so IFDs anywhere in the
+    # file are read as slices of the map; smaller ones get one bulk read
+    MMAP_THRESHOLD = 8 * 1024 * 1024
+    TIFF_PREFIX_SIZE = 64 * 1024
+
+    MAX_IFD_ENTRIES = 1024
+    MAX_VALUE_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, file_path, fields=None):
+        self.file_path = Path(file_path)
+        self.fields = fields
+        self.format = None
+        self.mode = None
+        self.width = None
+        self.height = None
+        self.exif_data = None
+
+    @profiled('ExifReader.read')
+    def read(self, fileobj=None):
+        try:
+            if fileobj is not None:
+                fileobj.seek(0)
+                return self._read(fileobj)
+
+            with open(self.file_path, 'rb') as f:
+                return self._read(f)
+        except (OSError, ValueError, struct.error):
+            return False
+
+    def _read(self, f):
+        head = f.read(8)
+
+        if head[:2] == b'\xff\xd8':
+            return self._read_jpeg(f)
+        if head == b'\x89PNG\r\n\x1a\n':
+            return self._read_png(f)
+        if head[:4] in (b'II*\x00', b'MM\x00*'):
+            return self._read_tiff(f)
+
+        return False
+
+    def _read_jpeg(self, f):
+        exif_segment = None
+        f.seek(2)
+
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return False
+
+            marker = header[1]
+            if marker == 0xFF:
+                f.seek(-3, 1)
+                continue
+
+            length = struct.unpack('>H', header[2:])[0]
+
+            if marker == 0xE1 and exif_segment is None:
+                segment = f.read(length - 2)
+                if segment[:6] == b'Exif\x00\x00':
+                    exif_segment = segment[6:]
+                continue
+
+            if marker in self.JPEG_SOF_MARKERS:
+                frame = f.read(6)
+                mode = self.JPEG_MODES.get(frame[5])
+                if frame[0] != 8 or mode is None:
+                    return False
+
+                self.format = 'JPEG'
+                self.mode = mode
+                self.height, self.width = struct.unpack('>HH', frame[1:5])
+                f.seek(length - 8, 1)
+                continue
+
+            if marker == 0xDA:
+                break
+
+            f.seek(length - 2, 1)
+
+        if self.format is None:
+            return False
+
+        if exif_segment:
+            self.exif_data = self._decode_tiff(
+                lambda offset, size: exif_segment[offset:offset + size]
+            )
+
+        return True
+
+    def _read_png(self, f):
+        ihdr = f.read(25)
+        if ihdr[4:8] != b'IHDR':
+            return False
+
+        width, height, bit_depth, color_type = struct.unpack('>IIBB', ihdr[8:18])
+        mode = self.PNG_MODES.get((bit_depth, color_type))
+        if mode is None:
+            return False
+
+        self.format = 'PNG'
+        self.mode = mode
+        self.width = width
+        self.height = height
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+
+            length = struct.unpack('>I', header[:4])[0]
+            chunk_type = header[4:]
+
+            if chunk_type == b'eXIf':
+                chunk = f.read(length)
+                if chunk[:6] == b'Exif\x00\x00':
+                    chunk = chunk[6:]
+                self.exif_data = self._decode_tiff(
+                    lambda offset, size: chunk[offset:offset + size]
+                )
+                break
+
+            if chunk_type == b'IEND':
+                break
+
+            f.seek(length + 4, 1)
+
+        return True
+
+    def _read_tiff(self, f):
+        try:
+            file_size = os.fstat(f.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            file_size = None
+
+        if file_size is not None and file_size >= self.MMAP_THRESHOLD:
+            return self._read_tiff_mapped(f)
+
+        f.seek(0)
+        prefix = f.read(self.TIFF_PREFIX_SIZE)
+
+        def read_at(offset, size):
+            end = offset + size
+            if end <= len(prefix):
+                return prefix[offset:end]
+            f.seek(offset)
+            return f.read(size)
+
+        return self._decode_tiff_image(read_at)
+
+    def _read_tiff_mapped(self, f):
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+
+        try:
+            return self._decode_tiff_image(lambda offset, size: view[offset:offset + size])
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # a slice is still referenced (e.g. by a traceback); the map
+                # is closed when it is garbage collected
+                pass
+
+    def _decode_tiff_image(self, read_at):
+        header = self._read_tiff_header(read_at)
+        if header is None:
+            return False
+
+        byte_order, ifd_offset = header
+        ifd0 = self._read_ifd(read_at, byte_order, ifd_offset, self._ifd0_wanted(self.TIFF_IMAGE_TAGS))
+
+        photometric = ifd0.get(0x0106)
+        samples = ifd0.get(0x0115, 1)
+        bits = ifd0.get(0x0102, 1)
+        if isinstance(bits, tuple):
+            bits = bits[0]
+
+        mode = self.TIFF_MODES.get((photometric, samples, bits))
+        if mode is None or 0x0100 not in ifd0 or 0x0101 not in ifd0:
+            return False
+
+        self.format = 'TIFF'
+        self.mode = mode
+        self.width = ifd0[0x0100]
+        self.height = ifd0[0x0101]
+        self.exif_data = self._merge_sub_ifds(ifd0, read_at, byte_order)
+
+        return True
+
+    def _decode_tiff(self, read_at):
+        header = self._read_tiff_header(read_at)
+        if header is None:
+            return None
+
+        byte_order, ifd_offset = header
+        ifd0 = self._read_ifd(read_at, byte_order, ifd_offset, self._ifd0_wanted())
+
+        return self._merge_sub_ifds(ifd0, read_at, byte_order)
+
+    def _read_tiff_header(self, read_at):
+        header = read_at(0, 8)
+        if header[:2] == b'II':
+            byte_order = '<'
+        elif header[:2] == b'MM':
+            byte_order = '>'
+        else:
+            return None
+
+        magic, ifd_offset = struct.unpack(byte_order + 'HI', header[2:8])
+        if magic != 42:
+            return None
+
+        return byte_order, ifd_offset
+
+    def _ifd0_wanted(self, extra=()):
+        if self.fields is None:
+            return None
+        return self.fields.tag_ids.union((self.EXIF_IFD, self.GPS_IFD), extra)
+
+    def _merge_sub_ifds(self, ifd0, read_at, byte_order):
+        fields = self.fields
+        merged = dict(ifd0)
+
+        exif_offset = ifd0.get(self.EXIF_IFD)
+        if isinstance(exif_offset, int) and (fields is None or not fields.tag_ids.issubset(ifd0)):
+            tag_ids = fields.tag_ids if fields is not None else None
+            merged.update(self._read_ifd(read_at, byte_order, exif_offset, tag_ids))
+
+        gps_offset = ifd0.get(self.GPS_IFD)
+        if isinstance(gps_offset, int) and (fields is None or fields.gps_tag_ids):
+            gps_tag_ids = fields.gps_tag_ids if fields is not None else None
+            merged[self.GPS_IFD] = self._read_ifd(read_at, byte_order, gps_offset, gps_tag_ids)
+
+        if fields is not None:
+            return fields.filter_tags(merged, self.GPS_IFD)
+
+        return merged
+
+    def _read_ifd(self, read_at, byte_order, offset, wanted=None):
+        entries = {}
+
+        count_bytes = read_at(offset, 2)
+        if len(count_bytes) < 2:
+            return entries
+
+        count = struct.unpack(byte_order + 'H', count_bytes)[0]
+        if count > self.MAX_IFD_ENTRIES:
+            return entries
+
+        table = read_at(offset + 2, count * 12)
+
+        for i in range(len(table) // 12):
+            entry = table[i * 12:(i + 1) * 12]
+            tag, field_type, value_count = struct.unpack(byte_order + 'HHI', entry[:8])
+
+            if wanted is not None and tag not in wanted:
+                continue
+
+            if field_type not in self.FIELD_TYPES:
+                continue
+
+            code, size = self.FIELD_TYPES[field_type]
+            data_size = size * value_count
+
+            if data_size > self.MAX_VALUE_BYTES:
+                continue
+
+            if data_size <= 4:
+                data = entry[8:8 + data_size]
+            else:
+                data_offset = struct.unpack(byte_order + 'I', entry[8:])[0]
+                data = read_at(data_offset, data_size)
+
+            if len(data) < data_size:
+                continue
+
+            entries[tag] = self._decode_value(byte_order, field_type, code, value_count, data)
+
+        return entries
+
+    def _decode_value(self, byte_order, field_type, code, value_count, data):
+        if field_type == 1 or field_type == 7:
+            return bytes(data)
+
+        if field_type == 2:
+            return bytes(data).split(b'\x00', 1)[0].decode('latin-1', 'replace')
+
+        if field_type in (5, 10):
+            numbers = struct.unpack(f"{byte_order}{value_count * 2}{code}", data)
+            values = tuple(
+                IFDRational(numbers[i], numbers[i + 1])
+                for i in range(0, len(numbers), 2)
+            )
+        else:
+            values = struct.unpack(f"{byte_order}{value_count}{code}", data)
+
+        if len(values) == 1:
+            return values[0]
+
+        return values
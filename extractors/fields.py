@@ -0,0 +1,111 @@
+from dataclasses import replace
+from typing import Dict, Any, Iterable, Optional
+
+from PIL.ExifTags import TAGS, GPSTAGS
+
+from extractors.record import MetadataRecord
+from parsers import ExifParser
+
+
+class FieldSelection:
+
+    # GPSLatitudeRef, GPSLatitude, GPSLongitudeRef, GPSLongitude
+    COORDINATE_TAGS = (1, 2, 3, 4)
+
+    GROUPS = ['gps', 'camera', 'settings']
+
+    def __init__(self, names: Iterable[str]):
+        self.names = frozenset(name.strip() for name in names if name.strip())
+
+        tag_ids_by_name = {}
+        for tag_id, name in TAGS.items():
+            tag_ids_by_name.setdefault(name, []).append(tag_id)
+
+        gps_ids_by_name = {name: tag_id for tag_id, name in GPSTAGS.items()}
+
+        tag_ids = set()
+        gps_tag_ids = set()
+
+        for name in self.names:
+            group = name.lower()
+
+            if group == 'gps':
+                gps_tag_ids.update(GPSTAGS)
+            elif group in self.GROUPS:
+                tag_ids.update(
+                    tag_id for tag_id, (category, _, _) in ExifParser.TAG_TABLE.items()
+                    if category == group
+                )
+            elif name in tag_ids_by_name:
+                tag_ids.update(tag_ids_by_name[name])
+            elif name in gps_ids_by_name:
+                gps_tag_ids.add(gps_ids_by_name[name])
+            else:
+                tag_id = self._parse_tag_id(name)
+                if tag_id is not None:
+                    tag_ids.add(tag_id)
+
+        if gps_tag_ids:
+            gps_tag_ids.update(self.COORDINATE_TAGS)
+
+        self.tag_ids = frozenset(tag_ids)
+        self.gps_tag_ids = frozenset(gps_tag_ids)
+
+    @staticmethod
+    def _parse_tag_id(name: str) -> Optional[int]:
+        try:
+            return int(name, 0)
+        except ValueError:
+            return None
+
+    def wants(self, name: str) -> bool:
+        return name in self.names
+
+    def wants_xmp(self) -> bool:
+        return any(':' in name for name in self.names)
+
+    def filter_tags(self, exif_data: Optional[Dict[int, Any]], gps_tag: int = 0x8825) -> Optional[Dict[int, Any]]:
+        if not exif_data:
+            return exif_data
+
+        filtered = {tag: value for tag, value in exif_data.items() if tag in self.tag_ids}
+
+        gps_data = exif_data.get(gps_tag)
+        if self.gps_tag_ids and isinstance(gps_data, dict):
+            filtered[gps_tag] = {
+                tag: value for tag, value in gps_data.items() if tag in self.gps_tag_ids
+            }
+
+        return filtered
+
+    def filter_document(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **metadata,
+            'pdf_metadata': {
+                key: value for key, value in metadata.get('pdf_metadata', {}).items() if key in self.names
+            },
+            'xmp_metadata': {
+                key: value for key, value in metadata.get('xmp_metadata', {}).items() if key in self.names
+            }
+        }
+
+    def apply(self, record):
+        if not isinstance(record, MetadataRecord):
+            return record
+
+        if record.document is not None:
+            return replace(record, document=self.filter_document(record.document))
+
+        tags = {tag: value for tag, value in (record.tags or {}).items() if tag in self.tag_ids}
+
+        gps_tags = None
+        if record.gps_tags and self.gps_tag_ids:
+            gps_tags = {tag: value for tag, value in record.gps_tags.items() if tag in self.gps_tag_ids}
+
+        return replace(
+            record,
+            tags=tags or None,
+            gps_tags=gps_tags or None,
+            latitude=record.latitude if gps_tags else None,
+            longitude=record.longitude if gps_tags else None
+        )
@@ -1,35 +1,47 @@
 from PIL import Image, UnidentifiedImageError
-from PIL.ExifTags import TAGS, GPSTAGS
+from PIL.ExifTags import GPSTAGS
 from pathlib import Path
 
-from parsers import GPSParser, ExifParser
-from utils import format_file_size
+from extractors.exif_reader import ExifReader
+from extractors.record import MetadataRecord, GPS_INFO_TAG, intern_tags, TAG_IDS, GPS_TAG_IDS
+from parsers import GPSParser
+from utils import profiled
 
 
 class ImageExtractor:
-    def __init__(self, file_path):
+    def __init__(self, file_path, fileobj=None, formats=None, fields=None):
         self.file_path = Path(file_path)
+        self.fileobj = fileobj
+        self.formats = formats
+        self.fields = fields
         self.image = None
         self.exif_data = None
+        self.format = None
+        self.mode = None
+        self.width = None
+        self.height = None
     
     def extract(self):
+        return self.extract_record().to_dict()
+    
+    def extract_record(self):
         try:
-            self.image = Image.open(self.file_path)
-            self.exif_data = self.image._getexif()
+            if not self._read_header():
+                self._open_image()
             
-            metadata = {
-                'basic_info': self._get_basic_info(),
-                'camera_info': {},
-                'settings_info': {},
-                'gps_info': {},
-                'gps_coords': (None, None),
-                'raw_exif': {}
-            }
+            record = MetadataRecord(
+                file_name=self.file_path.name,
+                file_size=self.file_path.stat().st_size,
+                format=self.format,
+                mode=self.mode,
+                width=self.width,
+                height=self.height
+            )
             
             if self.exif_data:
-                self._parse_exif(metadata)
+                self._parse_exif(record)
             
-            return metadata
+            return record
             
         except FileNotFoundError:
             raise
@@ -38,36 +50,57 @@ class ImageExtractor:
         except Exception as e:
             raise Exception(f"Error extracting image metadata: {e}")
     
-    def _get_basic_info(self):
-        return {
-            'file_name': self.file_path.name,
-            'file_size': format_file_size(self.file_path.stat().st_size),
-            'format': self.image.format,
-            'mode': self.image.mode,
-            'width': self.image.width,
-            'height': self.image.height,
-            'dimensions': f"{self.image.width} x {self.image.height}"
-        }
-    
-    def _parse_exif(self, metadata):
-        exif_dict = {}
-        gps_data = None
-        
-        for tag_id, value in self.exif_data.items():
-            tag = TAGS.get(tag_id, tag_id)
-            
-            if tag == "GPSInfo":
-                gps_data = value
-            else:
-                exif_dict[tag] = value
+    def _read_header(self):
+        reader = ExifReader(self.file_path, fields=self.fields)
+        if not reader.read(self.fileobj):
+            return False
         
-        camera_info, settings_info, raw_exif = ExifParser.categorize_tags(exif_dict)
+        self.format = reader.format
+        self.mode = reader.mode
+        self.width = reader.width
+        self.height = reader.height
+        self.exif_data = reader.exif_data
+        return True
+    
+    @profiled('ImageExtractor._open_image')
+    def _open_image(self):
+        if self.fileobj is not None:
+            self.fileobj.seek(0)
+            self.image = Image.open(self.fileobj, formats=self.formats)
+        else:
+            self.image = Image.open(self.file_path, formats=self.formats)
+        self.exif_data = self._merged_exif(self.image.getexif())
+        if self.fields is not None:
+            self.exif_data = self.fields.filter_tags(self.exif_data, GPS_INFO_TAG)
+        self.format = self.image.format
+        self.mode = self.image.mode
+        self.width = self.image.width
+        self.height = self.image.height
+    
+    @staticmethod
+    def _merged_exif(exif):
+        # the layout ExifReader and the private _getexif() of the JPEG, PNG and
+        # WebP plugins return: IFD0 and the Exif IFD flat, the GPS IFD nested.
+        # GIF, BMP and TIFF images only have the public getexif()
+        if not exif:
+            return None
+        merged = dict(exif)
+        merged.update(exif.get_ifd(ExifReader.EXIF_IFD))
+        if GPS_INFO_TAG in exif:
+            merged[GPS_INFO_TAG] = exif.get_ifd(GPS_INFO_TAG)
+        return merged
+    
+    @profiled('ImageExtractor._parse_exif')
+    def _parse_exif(self, record):
+        gps_data = self.exif_data.get(GPS_INFO_TAG)
         
-        metadata['camera_info'] = camera_info
-        metadata['settings_info'] = settings_info
-        metadata['raw_exif'] = raw_exif
+        record.tags = intern_tags(
+            {tag_id: value for tag_id, value in self.exif_data.items() if tag_id != GPS_INFO_TAG},
+            TAG_IDS
+        )
         
         if gps_data:
-            gps_info, lat, lon = GPSParser.parse(gps_data, GPSTAGS)
-            metadata['gps_info'] = gps_info
-            metadata['gps_coords'] = (lat, lon)
+            _, lat, lon = GPSParser.parse(gps_data, GPSTAGS)
+            record.gps_tags = intern_tags(gps_data, GPS_TAG_IDS)
+            record.latitude = lat
+            record.longitude = lon
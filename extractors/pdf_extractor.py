@@ -1,42 +1,109 @@
-from PyPDF2 import PdfReader
+import xml.etree.ElementTree as ElementTree
 from pathlib import Path
 
-from utils import format_file_size, format_pdf_date
+from PyPDF2 import PdfReader
+
+from extractors.record import MetadataRecord
+from utils import format_file_size, format_pdf_date, profiled
 
 
 class PDFExtractor:
-    
-    def __init__(self, file_path):
+
+    XMP_NAMESPACES = {
+        'http://purl.org/dc/elements/1.1/': 'dc',
+        'http://ns.adobe.com/xap/1.0/': 'xmp',
+        'http://ns.adobe.com/xap/1.0/mm/': 'xmpMM',
+        'http://ns.adobe.com/pdf/1.3/': 'pdf',
+        'http://ns.adobe.com/photoshop/1.0/': 'photoshop',
+        'http://ns.adobe.com/xap/1.0/rights/': 'xmpRights'
+    }
+
+    RDF_NAMESPACE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+
+    def __init__(self, file_path, fileobj=None, fields=None):
         self.file_path = Path(file_path)
+        self.fileobj = fileobj
+        self.fields = fields
         self.reader = None
-    
+        self.version = None
+
+    @profiled('PDFExtractor.extract')
     def extract(self):
         try:
-            self.reader = PdfReader(self.file_path)
-            
-            metadata = {
-                'basic_info': self._get_basic_info(),
-                'pdf_metadata': self._get_pdf_metadata()
-            }
-            
-            return metadata
-            
+            if self.fileobj is not None:
+                return self._extract(self.fileobj)
+
+            with open(self.file_path, 'rb') as f:
+                return self._extract(f)
+
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise Exception(f"Error extracting PDF metadata: {e}")
-    
+
+    def extract_record(self):
+        metadata = self.extract()
+        return MetadataRecord(
+            file_name=self.file_path.name,
+            file_size=self.file_path.stat().st_size,
+            format='PDF',
+            document=metadata
+        )
+
+    def _extract(self, f):
+        f.seek(0)
+        self.version = self._read_version(f)
+        f.seek(0)
+        self.reader = PdfReader(f, strict=False)
+
+        metadata = {
+            'basic_info': self._get_basic_info(),
+            'pdf_metadata': self._get_pdf_metadata(),
+            'xmp_metadata': {}
+        }
+
+        if self.fields is None or self.fields.wants_xmp():
+            metadata['xmp_metadata'] = self._get_xmp_metadata()
+
+        if self.fields is not None:
+            metadata = self.fields.filter_document(metadata)
+
+        return metadata
+
+    def _read_version(self, f):
+        header = f.read(1024)
+        start = header.find(b'%PDF-')
+        if start < 0:
+            return None
+        return header[start + 5:start + 16].split(None, 1)[0].decode('ascii', errors='ignore')
+
     def _get_basic_info(self):
         return {
             'file_name': self.file_path.name,
             'file_size': format_file_size(self.file_path.stat().st_size),
-            'num_pages': len(self.reader.pages)
+            'format': 'PDF',
+            'version': self.version,
+            'num_pages': self._get_page_count(),
+            'encrypted': self.reader.is_encrypted
         }
-    
+
+    def _get_page_count(self):
+        try:
+            count = self.reader.trailer['/Root']['/Pages']['/Count']
+            return int(count)
+        except (KeyError, TypeError, ValueError):
+            return None
+
     def _get_pdf_metadata(self):
-        pdf_meta = self.reader.metadata
-        
+        try:
+            pdf_meta = self.reader.trailer.get('/Info')
+            pdf_meta = pdf_meta.get_object() if pdf_meta is not None else None
+        except Exception:
+            return {}
+
         if not pdf_meta:
             return {}
-        
+
         common_fields = {
             '/Title': 'Title',
             '/Author': 'Author',
@@ -47,20 +114,59 @@ class PDFExtractor:
             '/ModDate': 'Modification Date',
             '/Keywords': 'Keywords'
         }
-        
+
         metadata = {}
-        
+
         for key, label in common_fields.items():
             if key in pdf_meta:
-                value = pdf_meta[key]
-                
+                value = str(pdf_meta[key])
+
                 if 'Date' in label:
                     value = format_pdf_date(value)
-                
+
                 metadata[label] = value
-        
+
         for key, value in pdf_meta.items():
             if key not in common_fields:
                 metadata[key] = str(value)
-        
+
         return metadata
+
+    def _get_xmp_metadata(self):
+        try:
+            stream = self.reader.trailer['/Root'].get('/Metadata')
+            if stream is None:
+                return {}
+            root = ElementTree.fromstring(stream.get_object().get_data())
+        except Exception:
+            return {}
+
+        metadata = {}
+
+        for element in root.iter():
+            if element.tag.startswith(f"{{{self.RDF_NAMESPACE}}}Description"):
+                for name, value in element.attrib.items():
+                    key = self._xmp_key(name)
+                    if key and value.strip():
+                        metadata[key] = value.strip()
+                continue
+
+            key = self._xmp_key(element.tag)
+            if not key:
+                continue
+
+            values = [
+                item.text.strip() for item in element.iter()
+                if item.text and item.text.strip()
+            ]
+            if values:
+                metadata[key] = ', '.join(values)
+
+        return metadata
+
+    def _xmp_key(self, name):
+        if not name.startswith('{'):
+            return None
+        namespace, local = name[1:].split('}', 1)
+        prefix = self.XMP_NAMESPACES.get(namespace)
+        return f"{prefix}:{local}" if prefix else None
@@ -0,0 +1,81 @@
+import io
+
+
+class PrefixReader(io.RawIOBase):
+
+    DEFAULT_PREFIX_SIZE = 64 * 1024
+
+    def __init__(self, raw, prefix_size: int = DEFAULT_PREFIX_SIZE):
+        self.raw = raw
+        self.prefix_size = max(1, prefix_size)
+        self.buffer = bytearray()
+        self.position = 0
+        self.eof = False
+        self.window = b''
+        self.window_start = 0
+        self.window_eof = False
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.raw.seek(0, io.SEEK_END)
+
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+
+        self.position = offset
+        return self.position
+
+    def readinto(self, b):
+        size = len(b)
+        end = self.position + size
+
+        # grow the buffer with one contiguous read (at least another prefix
+        # worth) when the request runs past it; requests that start beyond
+        # the buffer are served from a separate window of the same size, e.g.
+        # the cross-reference table at the end of a PDF
+        if end > len(self.buffer) and not self.eof and self.position <= len(self.buffer):
+            self._extend(end)
+
+        if self.position < len(self.buffer) or self.eof:
+            data = self.buffer[self.position:end]
+        else:
+            window_end = self.window_start + len(self.window)
+            if not self.window_start <= self.position <= window_end or (end > window_end and not self.window_eof):
+                wanted = max(size, self.prefix_size)
+                self.raw.seek(self.position)
+                self.window = self.raw.read(wanted)
+                self.window_start = self.position
+                self.window_eof = len(self.window) < wanted
+                self.reads += 1
+            data = self.window[self.position - self.window_start:end - self.window_start]
+
+        count = len(data)
+        b[:count] = data
+        self.position += count
+        return count
+
+    def _extend(self, end):
+        wanted = max(end - len(self.buffer), self.prefix_size)
+
+        self.raw.seek(len(self.buffer))
+        chunk = self.raw.read(wanted)
+        self.reads += 1
+
+        if len(chunk) < wanted:
+            self.eof = True
+        self.buffer += chunk
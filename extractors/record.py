@@ -0,0 +1,114 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Optional, Tuple
+
+from PIL.ExifTags import TAGS, GPSTAGS
+
+from parsers import ExifParser
+from utils import format_file_size, profiled
+
+
+GPS_INFO_TAG = 0x8825
+
+TAG_IDS = {tag_id: tag_id for tag_id in TAGS}
+GPS_TAG_IDS = {tag_id: tag_id for tag_id in GPSTAGS}
+
+
+def intern_tags(tags: Dict[int, Any], known_ids: Dict[int, int]) -> Dict[int, Any]:
+    return {known_ids.get(tag_id, tag_id): value for tag_id, value in tags.items()}
+
+
+@dataclass(slots=True)
+class MetadataRecord:
+
+    file_name: str
+    file_size: int
+    format: Optional[str] = None
+    mode: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    tags: Optional[Dict[int, Any]] = None
+    gps_tags: Optional[Dict[int, Any]] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    document: Optional[Dict[str, Any]] = None
+
+    @property
+    def dimensions(self) -> str:
+        return f"{self.width} x {self.height}"
+
+    @property
+    def file_size_display(self) -> str:
+        return format_file_size(self.file_size)
+
+    @property
+    def gps_coords(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.latitude, self.longitude
+
+    @property
+    def tag_count(self) -> int:
+        return len(self.tags) if self.tags else 0
+
+    def get_tag(self, name: str, default=None):
+        for tag_id, value in (self.tags or {}).items():
+            if TAGS.get(tag_id, tag_id) == name:
+                return value
+        return default
+
+    def renamed(self, file_name: str) -> 'MetadataRecord':
+        document = self.document
+        if document is not None and 'basic_info' in document:
+            document = {**document, 'basic_info': {**document['basic_info'], 'file_name': file_name}}
+        return replace(self, file_name=file_name, document=document)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.document is not None:
+            return self.document
+
+        metadata = {
+            'basic_info': {
+                'file_name': self.file_name,
+                'file_size': self.file_size_display,
+                'format': self.format,
+                'mode': self.mode,
+                'width': self.width,
+                'height': self.height,
+                'dimensions': self.dimensions
+            },
+            'camera_info': {},
+            'settings_info': {},
+            'gps_info': {},
+            'gps_coords': (None, None),
+            'raw_exif': {}
+        }
+
+        if self.tags:
+            camera_info, settings_info, raw_exif = ExifParser.classify_tags(self.tags)
+            metadata['camera_info'] = camera_info
+            metadata['settings_info'] = settings_info
+            metadata['raw_exif'] = raw_exif
+
+        if self.gps_tags:
+            metadata['gps_info'] = {
+                GPSTAGS.get(tag_id, tag_id): value for tag_id, value in self.gps_tags.items()
+            }
+            metadata['gps_coords'] = (self.latitude, self.longitude)
+
+        return metadata
+
+
+profiled.register(MetadataRecord, 'to_dict', 'MetadataRecord.to_dict')
+
+
+def as_metadata_dict(metadata) -> Dict[str, Any]:
+    if isinstance(metadata, MetadataRecord):
+        return metadata.to_dict()
+    return metadata
+
+
+def with_file_name(metadata, file_name: str):
+    # cached metadata reused for a renamed or copied file
+    if isinstance(metadata, MetadataRecord):
+        return metadata.renamed(file_name)
+    if 'basic_info' in metadata:
+        metadata = {**metadata, 'basic_info': {**metadata['basic_info'], 'file_name': file_name}}
+    return metadata
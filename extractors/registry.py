@@ -0,0 +1,122 @@
+import importlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from PIL import UnidentifiedImageError
+
+from extractors.image_extractor import ImageExtractor
+from extractors.prefix_reader import PrefixReader
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+class ExtractorRegistry:
+
+    PREFIX_SIZE = 1024
+
+    # name -> (extractor class, [(offset, magic)], extensions, extractor options)
+    # an offset of None matches the magic anywhere in the prefix; the class may
+    # be given as a 'module:Class' string so heavy backends load on first use
+    _entries: Dict[str, Tuple[Any, List[Tuple[Optional[int], bytes]], List[str], Dict[str, Any]]] = {}
+
+    @classmethod
+    def register(cls, name, extractor_class, signatures, extensions=(), **options):
+        cls._entries[name] = (
+            extractor_class,
+            list(signatures),
+            [ext.lower() for ext in extensions],
+            options
+        )
+
+    @classmethod
+    def unregister(cls, name):
+        cls._entries.pop(name, None)
+
+    @classmethod
+    def detect(cls, prefix: bytes) -> Optional[str]:
+        for name, (_, signatures, _, _) in cls._entries.items():
+            for offset, magic in signatures:
+                if offset is None:
+                    if magic in prefix:
+                        return name
+                elif prefix[offset:offset + len(magic)] == magic:
+                    return name
+        return None
+
+    @classmethod
+    def detect_file(cls, file_path) -> Optional[str]:
+        try:
+            with open(file_path, 'rb') as f:
+                return cls.detect(f.read(cls.PREFIX_SIZE))
+        except OSError:
+            return None
+
+    @classmethod
+    def known_extensions(cls) -> List[str]:
+        extensions = []
+        for _, _, entry_extensions, _ in cls._entries.values():
+            extensions.extend(ext for ext in entry_extensions if ext not in extensions)
+        return extensions
+
+    @classmethod
+    def extractor_class(cls, name) -> type:
+        extractor_class, signatures, extensions, options = cls._entries[name]
+        if isinstance(extractor_class, str):
+            module_name, class_name = extractor_class.split(':')
+            extractor_class = getattr(importlib.import_module(module_name), class_name)
+            cls._entries[name] = (extractor_class, signatures, extensions, options)
+        return extractor_class
+
+    @classmethod
+    def preload(cls):
+        # resolves lazily registered extractors, e.g. before forking workers
+        for name in list(cls._entries):
+            cls.extractor_class(name)
+
+    @classmethod
+    def create(cls, name, file_path, fileobj=None, fields=None):
+        extractor_class = cls.extractor_class(name)
+        options = cls._entries[name][3]
+        return extractor_class(file_path, fileobj=fileobj, fields=fields, **options)
+
+    @classmethod
+    def extract(cls, file_path, record=False, fields=None, prefix_size=None):
+        file_path = Path(file_path)
+
+        with open(file_path, 'rb', buffering=0 if prefix_size else -1) as raw:
+            f = PrefixReader(raw, prefix_size) if prefix_size else raw
+            name = cls.detect(f.read(cls.PREFIX_SIZE))
+
+            if name is None:
+                if file_path.suffix.lower() in cls.known_extensions():
+                    raise UnidentifiedImageError(f"cannot identify file {file_path}")
+                raise UnsupportedFormatError(f"Unsupported file type: {file_path.name}")
+
+            f.seek(0)
+            extractor = cls.create(name, file_path, f, fields=fields)
+            return extractor.extract_record() if record else extractor.extract()
+
+
+ExtractorRegistry.register(
+    'jpeg', ImageExtractor, [(0, b'\xff\xd8\xff')], ['.jpg', '.jpeg'], formats=['JPEG', 'MPO']
+)
+ExtractorRegistry.register(
+    'png', ImageExtractor, [(0, b'\x89PNG\r\n\x1a\n')], ['.png'], formats=['PNG']
+)
+ExtractorRegistry.register(
+    'tiff', ImageExtractor, [(0, b'II*\x00'), (0, b'MM\x00*')], ['.tiff', '.tif'], formats=['TIFF']
+)
+ExtractorRegistry.register(
+    'gif', ImageExtractor, [(0, b'GIF87a'), (0, b'GIF89a')], ['.gif'], formats=['GIF']
+)
+ExtractorRegistry.register(
+    'bmp', ImageExtractor, [(0, b'BM')], ['.bmp'], formats=['BMP']
+)
+ExtractorRegistry.register(
+    'webp', ImageExtractor, [(8, b'WEBP')], ['.webp'], formats=['WEBP']
+)
+ExtractorRegistry.register(
+    'pdf', 'extractors.pdf_extractor:PDFExtractor', [(None, b'%PDF-')], ['.pdf']
+)
@@ -1,13 +1,12 @@
+import os
 import sys
 import time
 import argparse
 
-from config import AnalysisConfig
-from core import MetadataAnalyzer
-from utils.banner import print_banner, print_slow
-
 __version__ = "1.0.0"
 
+DEFAULT_INDEX_PATH = "./.metadata_index.db"
+
 
 def setup_argument_parser():
     parser = argparse.ArgumentParser(
@@ -16,12 +15,29 @@ def setup_argument_parser():
 Examples:
   %(prog)s -i photo.jpg                    # Extract metadata from photo.jpg
   %(prog)s --folder images/                # Batch process all images in folder
+  %(prog)s --folder images/ --workers 8    # Batch process using 8 worker processes
+  %(prog)s --folder images/ -r --exclude 'thumbs/*'  # Recurse into subfolders
+  %(prog)s --folder images/ --cache        # Skip re-extracting unchanged files
+  %(prog)s --folder images/ --incremental  # Only analyze new or modified files
+  %(prog)s --folder intake/ --dedup        # Extract identical files only once
+  %(prog)s --folder dropbox/ --watch --format jsonl  # Keep running, analyze files as they arrive
+  %(prog)s --folder images/ --fields DateTimeOriginal,Make,Model,gps  # Only these fields
+  %(prog)s --folder images/ --gps-export shots.geojson  # GPS summary and map export
+  %(prog)s --folder images/ --geocode cities1000.txt    # Nearest place for GPS-tagged files
+  %(prog)s --folder /mnt/nfs/ --prefix-read # One bulk read per file on network storage
+  %(prog)s --folder images/ --profile      # Per-stage timing summary
   %(prog)s -i photo.jpg -o result.txt      # Save to custom output file
+  %(prog)s --folder images/ --format jsonl # Stream one JSON record per file
+  %(prog)s --folder images/ --single-file  # Save all text reports into one file
+  %(prog)s --folder images/ --progress     # Progress line instead of per-file reports
   %(prog)s -i photo.jpg --no-save          # Don't save results to file
   %(prog)s -i photo.jpg --quiet            # Minimal output (no banner, no typing)
   %(prog)s -i photo.jpg --no-typing        # Disable typing effect
   %(prog)s -i photo.jpg --no-banner        # Skip ASCII banner
   %(prog)s --interactive                   # Interactive mode (prompts for input)
+  %(prog)s --folder images/ --index        # Also record results in the local metadata index
+  %(prog)s query --model "Canon EOS 5D" --after 2023-01-01  # Search indexed results
+  %(prog)s serve --port 8765               # Warm extraction service for other tools
 
 For more information, visit: https://github.com/Cronston/Metadata-info
         ''',
@@ -42,6 +58,218 @@ For more information, visit: https://github.com/Cronston/Metadata-info
         help='Path to folder containing images to analyze'
     )
     
+    parser.add_argument(
+        '-r', '--recursive',
+        action='store_true',
+        help='Scan subfolders when analyzing a folder'
+    )
+    
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        metavar='N',
+        help='Maximum subfolder depth to scan (implies --recursive)'
+    )
+    
+    parser.add_argument(
+        '--include',
+        action='append',
+        metavar='GLOB',
+        help='Only analyze files matching this glob (repeatable)'
+    )
+    
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        metavar='GLOB',
+        help='Skip files and folders matching this glob (repeatable)'
+    )
+    
+    parser.add_argument(
+        '--symlinks',
+        choices=['skip', 'files', 'follow'],
+        default='files',
+        help='Symlink policy: skip all, include linked files only, or follow linked folders too (default: files)'
+    )
+    
+    parser.add_argument(
+        '--skip-hidden',
+        action='store_true',
+        help='Skip hidden files and folders (names starting with a dot)'
+    )
+    
+    parser.add_argument(
+        '--detect-content',
+        action='store_true',
+        help='Also pick up renamed or extensionless files in folders by sniffing their magic bytes'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Number of worker processes for folder analysis (0 = all CPU cores, default: 1)'
+    )
+    
+    parser.add_argument(
+        '--unordered',
+        action='store_true',
+        help='Report folder results as soon as they finish instead of in file order'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only analyze files that are new or changed since the last run of this folder'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='After the folder run, keep watching the folder and analyze new or rewritten '
+             'files as they finish writing (Ctrl+C to stop)'
+    )
+    
+    parser.add_argument(
+        '--watch-settle',
+        type=float,
+        metavar='SECONDS',
+        help='With --watch, wait until a file has been unchanged this long before analyzing it (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--watch-poll',
+        type=float,
+        nargs='?',
+        const=2.0,
+        metavar='SECONDS',
+        help='With --watch, rescan the folder on an interval instead of using inotify, e.g. for '
+             'network mounts (default interval: 2)'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Detect byte-identical files in a folder run; later copies reuse the first '
+             'copy\'s result and are reported as duplicates'
+    )
+    
+    cache_group = parser.add_mutually_exclusive_group()
+    
+    cache_group.add_argument(
+        '--cache',
+        action='store_true',
+        help='Reuse metadata cached from previous runs for unchanged files'
+    )
+    
+    cache_group.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the metadata cache'
+    )
+    
+    cache_group.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='Clear the metadata cache and repopulate it during this run'
+    )
+    
+    parser.add_argument(
+        '--cache-file',
+        type=str,
+        metavar='FILE',
+        help='Metadata cache location (default: ./.metadata_cache.db)'
+    )
+    
+    parser.add_argument(
+        '--cache-hash',
+        action='store_true',
+        help='Also match cache entries by content hash (finds renamed or copied files)'
+    )
+    
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        metavar='MB',
+        help='Maximum cache size in MB before least recently used entries are evicted (default: 512)'
+    )
+    
+    parser.add_argument(
+        '--prefix-read',
+        type=int,
+        nargs='?',
+        const=64,
+        metavar='KB',
+        help='Read each file with one bulk read of its first KB kilobytes (default: 64), '
+             'reading further only if metadata lies beyond it; useful on network filesystems'
+    )
+    
+    parser.add_argument(
+        '--fields',
+        action='append',
+        metavar='NAMES',
+        help='Only extract and report these comma-separated fields: EXIF/GPS tag names, '
+             'numeric tag IDs, PDF/XMP keys, or the groups gps, camera, settings (repeatable)'
+    )
+    
+    parser.add_argument(
+        '--gps-summary',
+        action='store_true',
+        help='After a folder run, print the bounding box, busiest grid cells and clusters of GPS-tagged files'
+    )
+    
+    parser.add_argument(
+        '--gps-export',
+        type=str,
+        metavar='FILE',
+        help='Write the coordinates of GPS-tagged files to a GeoJSON (or .csv) file; implies --gps-summary'
+    )
+    
+    parser.add_argument(
+        '--gps-cell',
+        type=float,
+        metavar='DEG',
+        help='Grid cell size in degrees for the GPS histogram and clustering (default: 0.01, about 1 km)'
+    )
+    
+    parser.add_argument(
+        '--geocode',
+        type=str,
+        metavar='GAZETTEER',
+        help='Annotate GPS positions with the nearest place and country from a GeoNames dump '
+             '(e.g. cities1000.txt); a memory-mapped index is built next to it on first use'
+    )
+    
+    parser.add_argument(
+        '--geocode-radius',
+        type=float,
+        metavar='KM',
+        help='Only report places within this distance of the GPS position (default: 100)'
+    )
+    
+    parser.add_argument(
+        '--tag-categories',
+        type=str,
+        metavar='FILE',
+        help='JSON file mapping report sections (camera, settings, other) to lists of EXIF tag names'
+    )
+    
+    parser.add_argument(
+        '--index',
+        type=str,
+        nargs='?',
+        const=DEFAULT_INDEX_PATH,
+        metavar='FILE',
+        help=f'Record results in a local SQLite index searchable with the query command (default: {DEFAULT_INDEX_PATH})'
+    )
+    
+    parser.add_argument(
+        '--index-hash',
+        action='store_true',
+        help='Also store a content hash of each indexed file (reads every file in full)'
+    )
+    
     parser.add_argument(
         '-o', '--output',
         type=str,
@@ -49,6 +277,33 @@ For more information, visit: https://github.com/Cronston/Metadata-info
         help='Custom output file path (default: auto-generated in ./save/)'
     )
     
+    parser.add_argument(
+        '--format',
+        choices=['text', 'jsonl', 'csv', 'tsv'],
+        default='text',
+        help='Saved output format; jsonl/csv/tsv append one record per file to a single file (default: text)'
+    )
+    
+    parser.add_argument(
+        '--single-file',
+        action='store_true',
+        help='Write all text reports of a run into one file instead of one file per image'
+    )
+    
+    parser.add_argument(
+        '--rotate-size',
+        type=int,
+        metavar='MB',
+        help='Start a new numbered output file once the current one exceeds this size'
+    )
+    
+    parser.add_argument(
+        '--fsync-every',
+        type=int,
+        metavar='N',
+        help='Force saved records to disk every N files (default: once at the end of the run)'
+    )
+    
     parser.add_argument(
         '--no-save',
         action='store_true',
@@ -61,6 +316,12 @@ For more information, visit: https://github.com/Cronston/Metadata-info
         help='Minimal output mode (no banner, no typing effect)'
     )
     
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='For folder runs, show a live progress line and summary instead of per-file reports'
+    )
+    
     parser.add_argument(
         '--no-typing',
         action='store_true',
@@ -73,6 +334,19 @@ For more information, visit: https://github.com/Cronston/Metadata-info
         help='Skip ASCII art banner'
     )
     
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Time each processing stage and print a per-stage summary with the slowest files'
+    )
+    
+    parser.add_argument(
+        '--profile-json',
+        type=str,
+        metavar='FILE',
+        help='Also save the profile summary as JSON (implies --profile)'
+    )
+    
     parser.add_argument(
         '-v', '--version',
         action='version',
@@ -88,7 +362,299 @@ For more information, visit: https://github.com/Cronston/Metadata-info
     return parser
 
 
+def setup_query_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py query',
+        description='Search the local metadata index written by runs with --index',
+        epilog='''
+Examples:
+  %(prog)s --model "Canon EOS 5D" --after 2023-01-01 --before 2023-06-30
+  %(prog)s --bbox 48.80 2.25 48.90 2.42 --format jsonl
+  %(prog)s --text "Adobe Photoshop" --count
+  %(prog)s --hash DIGEST --format paths    # Copies of a file indexed with --index-hash
+        ''',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--index',
+        type=str,
+        default=DEFAULT_INDEX_PATH,
+        metavar='FILE',
+        help=f'Metadata index to search (default: {DEFAULT_INDEX_PATH})'
+    )
+    
+    parser.add_argument(
+        '--make',
+        type=str,
+        help='Camera make (case-insensitive exact match)'
+    )
+    
+    parser.add_argument(
+        '--model',
+        type=str,
+        help='Camera model (case-insensitive exact match)'
+    )
+    
+    parser.add_argument(
+        '--after',
+        type=str,
+        metavar='DATE',
+        help='Taken on or after this date (YYYY-MM-DD or "YYYY-MM-DD HH:MM:SS")'
+    )
+    
+    parser.add_argument(
+        '--before',
+        type=str,
+        metavar='DATE',
+        help='Taken on or before this date (a bare date includes the whole day)'
+    )
+    
+    parser.add_argument(
+        '--bbox',
+        type=float,
+        nargs=4,
+        metavar=('MIN_LAT', 'MIN_LON', 'MAX_LAT', 'MAX_LON'),
+        help='Only files whose GPS position lies inside this box'
+    )
+    
+    parser.add_argument(
+        '--hash',
+        type=str,
+        metavar='DIGEST',
+        help='Only files with this content hash'
+    )
+    
+    parser.add_argument(
+        '--text',
+        type=str,
+        metavar='QUERY',
+        help='Full-text search over paths and text tags (SQLite FTS5 syntax)'
+    )
+    
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=100,
+        metavar='N',
+        help='Maximum number of results, 0 for all (default: 100)'
+    )
+    
+    parser.add_argument(
+        '--count',
+        action='store_true',
+        help='Only print the number of matching files'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=['text', 'jsonl', 'paths'],
+        default='text',
+        help='Result format: a summary line, the stored metadata as JSON lines, or bare paths (default: text)'
+    )
+    
+    return parser
+
+
+def run_query(argv):
+    parser = setup_query_parser()
+    args = parser.parse_args(argv)
+    
+    if args.bbox and (args.bbox[0] > args.bbox[2] or args.bbox[1] > args.bbox[3]):
+        parser.error("--bbox minimum latitude/longitude must not exceed the maximum")
+    
+    if not os.path.exists(args.index):
+        print(f"No metadata index found at {args.index}; analyze files with --index first")
+        sys.exit(1)
+    
+    import json
+    import sqlite3
+    from core.index import MetadataIndex
+    
+    try:
+        index = MetadataIndex(args.index)
+    except sqlite3.OperationalError as e:
+        print(f"Could not open metadata index {args.index}: {e}")
+        sys.exit(1)
+    
+    filters = {
+        'make': args.make,
+        'model': args.model,
+        'after': args.after,
+        'before': args.before,
+        'bbox': args.bbox,
+        'digest': args.hash,
+        'text': args.text
+    }
+    
+    try:
+        if args.count:
+            print(index.count(**filters))
+            return
+        
+        for entry in index.query(**filters, limit=args.limit or None, with_metadata=args.format == 'jsonl'):
+            if args.format == 'paths':
+                print(entry['path'])
+            elif args.format == 'jsonl':
+                print(json.dumps(entry, ensure_ascii=False))
+            else:
+                camera = ' '.join(part for part in (entry['make'], entry['model']) if part) or '-'
+                position = (
+                    f"{entry['latitude']:.6f},{entry['longitude']:.6f}"
+                    if entry['latitude'] is not None and entry['longitude'] is not None else '-'
+                )
+                print(f"{entry['datetime_original'] or '-':19}  {camera:30}  {position:22}  {entry['path']}")
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    except sqlite3.OperationalError as e:
+        print(f"Query failed: {e}")
+        sys.exit(2)
+    finally:
+        index.close()
+
+
+def setup_serve_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py serve',
+        description='Serve metadata extraction over localhost HTTP or a Unix socket from a warm worker pool',
+        epilog='''
+Examples:
+  %(prog)s --port 8765 --workers 4
+  %(prog)s --socket /run/metadata.sock --allow-dir /srv/evidence
+
+Requests:
+  GET  /extract?path=/abs/photo.jpg[&path=...][&fields=Make,Model]
+  POST /extract  {"path": "/abs/photo.jpg"}  or  {"paths": [...], "fields": ["gps"]}
+  GET  /health
+
+  curl -s 'http://127.0.0.1:8765/extract?path=/srv/evidence/photo.jpg'
+  curl -s --unix-socket /run/metadata.sock -d '{"paths": ["/srv/a.jpg", "/srv/b.pdf"]}' http://localhost/extract
+        ''',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    listen_group = parser.add_mutually_exclusive_group()
+    
+    listen_group.add_argument(
+        '--socket',
+        type=str,
+        metavar='PATH',
+        help='Listen on this Unix socket instead of TCP'
+    )
+    
+    listen_group.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='TCP port to listen on (default: 8765)'
+    )
+    
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='Address to bind for TCP (default: 127.0.0.1)'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Number of worker processes started up front (default: 0 = one per CPU core)'
+    )
+    
+    parser.add_argument(
+        '--max-pending',
+        type=int,
+        metavar='N',
+        help='Files queued or in progress before new requests get 503 (default: 64 per worker)'
+    )
+    
+    parser.add_argument(
+        '--allow-dir',
+        action='append',
+        default=[],
+        metavar='DIR',
+        help='Only serve files under this directory (repeatable; default: any absolute path)'
+    )
+    
+    parser.add_argument(
+        '--fields',
+        type=str,
+        metavar='NAMES',
+        help='Default comma-separated fields for requests that do not specify their own'
+    )
+    
+    parser.add_argument(
+        '--prefix-read',
+        type=int,
+        nargs='?',
+        const=64,
+        metavar='KB',
+        help='Read each file with one bulk read of its first KB kilobytes (default: 64)'
+    )
+    
+    return parser
+
+
+def run_serve(argv):
+    parser = setup_serve_parser()
+    args = parser.parse_args(argv)
+    
+    if args.workers < 0:
+        parser.error("--workers must not be negative")
+    if args.max_pending is not None and args.max_pending < 1:
+        parser.error("--max-pending must be at least 1")
+    
+    import signal
+    from core.server import ExtractionService, LocalHTTPServer, UnixHTTPServer
+    
+    service = ExtractionService(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        fields=[name.strip() for name in (args.fields or '').split(',') if name.strip()],
+        prefix_size=args.prefix_read * 1024 if args.prefix_read else None,
+        allowed_dirs=args.allow_dir
+    )
+    
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, stop)
+    
+    server = None
+    try:
+        if args.socket:
+            server = UnixHTTPServer(args.socket, service)
+        else:
+            server = LocalHTTPServer(args.host, args.port, service)
+    except OSError as e:
+        print(f"Cannot listen: {e}")
+        sys.exit(1)
+    
+    try:
+        service.start()
+        print(f"Serving on {server.url} with {service.workers} worker processes "
+              f"(max {service.max_pending} pending files), press Ctrl+C to stop", flush=True)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        server.server_close()
+        service.close()
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        run_query(sys.argv[2:])
+        return
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        run_serve(sys.argv[2:])
+        return
+    
     parser = setup_argument_parser()
     
     if len(sys.argv) == 1:
@@ -97,6 +663,15 @@ def main():
         
     args = parser.parse_args()
     
+    if args.watch and not args.folder:
+        parser.error("--watch requires --folder")
+    
+    # imported only after argparse has handled --help/--version, which then
+    # exit without loading Pillow or any extractor
+    from config import AnalysisConfig
+    from core.metadata_analyzer import MetadataAnalyzer
+    from utils.banner import print_banner, print_slow
+    
     if args.input or args.folder:
         config = AnalysisConfig.from_args(args)
         
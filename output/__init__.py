@@ -1,5 +1,34 @@
-from .formatter import OutputFormatter
-from .file_saver import FileSaver
-from .console_writer import ConsoleWriter
+import importlib
 
-__all__ = ['OutputFormatter', 'FileSaver', 'ConsoleWriter']
+_EXPORTS = {
+    'OutputFormatter': '.formatter',
+    'FileSaver': '.file_saver',
+    'ConsoleWriter': '.console_writer',
+    'ProgressReporter': '.progress',
+    'RecordWriter': '.writers',
+    'TextWriter': '.writers',
+    'JsonLinesWriter': '.writers',
+    'CsvWriter': '.writers',
+    'TsvWriter': '.writers',
+    'WRITERS': '.writers',
+    'create_writer': '.writers',
+    'json_record': '.writers',
+}
+
+__all__ = [
+    'OutputFormatter', 'FileSaver', 'ConsoleWriter', 'ProgressReporter',
+    'RecordWriter', 'TextWriter', 'JsonLinesWriter', 'CsvWriter', 'TsvWriter', 'WRITERS', 'create_writer',
+    'json_record'
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
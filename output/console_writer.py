@@ -1,7 +1,10 @@
+import sys
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
+from extractors.record import as_metadata_dict
 from parsers import GPSParser, ExifParser
+from utils import profiled
 
 
 class ConsoleWriter:
@@ -36,54 +39,90 @@ class ConsoleWriter:
         else:
             print(text)
     
+    @profiled('ConsoleWriter.print_metadata')
     def print_metadata(self, metadata: Dict[str, Any]):
-        self.print_section_header("BASIC INFORMATION")
+        metadata = as_metadata_dict(metadata)
+        if not self.typing_enabled:
+            sys.stdout.write('\n'.join(self.render_lines(metadata)) + '\n')
+            return
+        
+        for kind, text in self.build_report(metadata):
+            if kind == 'header':
+                self.print_section_header(text)
+            elif kind == 'item':
+                self.print_item(text)
+            else:
+                self.print_message(text, 0.02)
+    
+    @staticmethod
+    def build_report(metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+        metadata = as_metadata_dict(metadata)
+        report = []
+        
+        def header(text):
+            report.append(('header', text))
+        
+        def item(text):
+            report.append(('item', text))
+        
+        def message(text):
+            report.append(('message', text))
+        
+        if 'pdf_metadata' in metadata:
+            return ConsoleWriter._build_pdf_report(metadata)
+        
+        header("BASIC INFORMATION")
         basic = metadata['basic_info']
-        self.print_item(f"File Name                      : {basic['file_name']}")
-        self.print_item(f"File Size                      : {basic['file_size']}")
-        self.print_item(f"Image Format                   : {basic['format']}")
-        self.print_item(f"Image Mode                     : {basic['mode']}")
-        self.print_item(f"Dimensions                     : {basic['dimensions']}")
+        item(f"File Name                      : {basic['file_name']}")
+        item(f"File Size                      : {basic['file_size']}")
+        item(f"Image Format                   : {basic['format']}")
+        item(f"Image Mode                     : {basic['mode']}")
+        item(f"Dimensions                     : {basic['dimensions']}")
         
         if not metadata['camera_info'] and not metadata['settings_info'] and not metadata['raw_exif']:
-            self.print_message("\nNo EXIF metadata found in this image", 0.03)
-            return
+            message("\nNo EXIF metadata found in this image")
+            return report
         
         if metadata['camera_info']:
-            self.print_section_header("CAMERA INFORMATION")
+            header("CAMERA INFORMATION")
             for key, value in metadata['camera_info'].items():
-                self.print_item(f"{key:30} : {value}")
+                item(f"{key:30} : {value}")
         
         if metadata['settings_info']:
-            self.print_section_header("CAMERA SETTINGS")
+            header("CAMERA SETTINGS")
             for key, value in metadata['settings_info'].items():
                 formatted_value = ExifParser.format_value(key, value)
-                self.print_item(f"{key:30} : {formatted_value}")
+                item(f"{key:30} : {formatted_value}")
         
         if metadata['gps_coords'][0] is not None:
-            self.print_section_header("GPS LOCATION DATA")
+            header("GPS LOCATION DATA")
             lat, lon = metadata['gps_coords']
             
-            self.print_item(f"Latitude                       : {lat:.6f}°")
-            self.print_item(f"Longitude                      : {lon:.6f}°")
-            self.print_item(f"Coordinates                    : {lat:.6f}, {lon:.6f}")
+            item(f"Latitude                       : {lat:.6f}°")
+            item(f"Longitude                      : {lon:.6f}°")
+            item(f"Coordinates                    : {lat:.6f}, {lon:.6f}")
+            
+            location = metadata.get('location')
+            if location:
+                item(f"Nearest Place                  : {location['place']}, {location['country']} "
+                     f"({location['distance_km']:.1f} km)")
             
             maps_link = GPSParser.get_maps_link(lat, lon)
             if maps_link:
-                self.print_item(f"Google Maps                    : {maps_link}")
+                item(f"Google Maps                    : {maps_link}")
             
             for key, value in metadata['gps_info'].items():
                 if key not in ['GPSLatitude', 'GPSLongitude', 'GPSLatitudeRef', 'GPSLongitudeRef']:
-                    self.print_item(f"{key:30} : {str(value)}")
+                    item(f"{key:30} : {str(value)}")
         
         if metadata['raw_exif']:
-            self.print_section_header("RAW EXIF DATA (ALL TAGS)")
+            header("RAW EXIF DATA (ALL TAGS)")
             
-            sorted_tags = sorted(metadata['raw_exif'].items())
+            sorted_tags = sorted(metadata['raw_exif'].items(), key=lambda tag: str(tag[0]))
             
             for key, value in sorted_tags:
                 formatted_value = ExifParser.format_value(key, value)
-                self.print_item(f"{key:30} : {formatted_value}")
+                item(f"{key:30} : {formatted_value}")
         
         total_tags = (
             len(metadata['camera_info']) +
@@ -91,7 +130,53 @@ class ConsoleWriter:
             len(metadata['raw_exif'])
         )
         
-        self.print_message(f"\nExtracted {total_tags} EXIF tags", 0.02)
+        message(f"\nExtracted {total_tags} EXIF tags")
+        return report
+    
+    @staticmethod
+    def _build_pdf_report(metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+        report = [('header', "BASIC INFORMATION")]
+        basic = metadata['basic_info']
+        version = f" {basic['version']}" if basic.get('version') else ""
+        pages = basic['num_pages'] if basic.get('num_pages') is not None else 'Unknown'
+        
+        report.append(('item', f"File Name                      : {basic['file_name']}"))
+        report.append(('item', f"File Size                      : {basic['file_size']}"))
+        report.append(('item', f"Document Format                : PDF{version}"))
+        report.append(('item', f"Pages                          : {pages}"))
+        report.append(('item', f"Encrypted                      : {'Yes' if basic.get('encrypted') else 'No'}"))
+        
+        pdf_metadata = metadata.get('pdf_metadata', {})
+        xmp_metadata = metadata.get('xmp_metadata', {})
+        
+        if not pdf_metadata and not xmp_metadata:
+            report.append(('message', "\nNo document metadata found in this file"))
+            return report
+        
+        if pdf_metadata:
+            report.append(('header', "DOCUMENT INFORMATION"))
+            for key, value in pdf_metadata.items():
+                report.append(('item', f"{key:30} : {ExifParser.format_value(key, value)}"))
+        
+        if xmp_metadata:
+            report.append(('header', "XMP METADATA"))
+            for key, value in sorted(xmp_metadata.items()):
+                report.append(('item', f"{key:30} : {ExifParser.format_value(key, value)}"))
+        
+        report.append(('message', f"\nExtracted {len(pdf_metadata) + len(xmp_metadata)} metadata fields"))
+        return report
+    
+    @staticmethod
+    def render_lines(metadata: Dict[str, Any]) -> List[str]:
+        lines = []
+        
+        for kind, text in ConsoleWriter.build_report(metadata):
+            if kind == 'header':
+                lines.extend(["", "=" * 70, text, "=" * 70])
+            else:
+                lines.append(text)
+        
+        return lines
     
     def _print_slow(self, text: str, delay: float):
         for char in text:
@@ -1,22 +1,30 @@
 from pathlib import Path
 from datetime import datetime
 
+from utils import profiled
+
 
 class FileSaver:
     
     def __init__(self, save_dir="./save"):
         self.save_dir = Path(save_dir)
-        self.ensure_directory()
     
     def ensure_directory(self):
         self.save_dir.mkdir(exist_ok=True)
     
     def generate_filename(self, original_filename):
+        self.ensure_directory()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         stem = Path(original_filename).stem
         filename = f"metadata_{stem}_{timestamp}.txt"
         return self.save_dir / filename
     
+    def generate_run_filename(self, extension):
+        self.ensure_directory()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.save_dir / f"metadata_run_{timestamp}{extension}"
+    
+    @profiled('FileSaver.save')
     def save(self, output_lines, original_filename):
         try:
             output_file = self.generate_filename(original_filename)
@@ -29,6 +37,7 @@ class FileSaver:
             print(f"Error saving file: {e}")
             return None
     
+    @profiled('FileSaver.save')
     def save_to_custom_path(self, output_lines, custom_path):
         try:
             output_file = Path(custom_path)
@@ -0,0 +1,65 @@
+import sys
+import threading
+import time
+
+
+class ProgressReporter:
+
+    def __init__(self, stream=None, interval: float = 0.1):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.interactive = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.processed = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.last_width = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+        if self.interactive:
+            # redrawn on a timer so the rate keeps moving while a slow file is
+            # extracted or a watched folder is idle
+            self.thread = threading.Thread(target=self._run, name='progress', daemon=True)
+            self.thread.start()
+
+    def update(self, error: bool = False):
+        self.processed += 1
+        if error:
+            self.errors += 1
+
+    def finish(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        now = time.monotonic()
+
+        if self.interactive:
+            self.stream.write('\r' + ' ' * self.last_width + '\r')
+
+        elapsed = now - self.started
+        self.stream.write(
+            f"Processed {self.processed} files ({self.errors} errors) "
+            f"in {elapsed:.1f}s, {self._rate(elapsed):.1f} files/sec\n"
+        )
+        self.stream.flush()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self._render(time.monotonic())
+
+    def _render(self, now: float):
+        elapsed = now - self.started
+        line = (
+            f"Processed {self.processed} files | errors {self.errors} | "
+            f"{self._rate(elapsed):.1f} files/sec | {elapsed:.0f}s elapsed"
+        )
+        padding = ' ' * max(0, self.last_width - len(line))
+        self.last_width = len(line)
+
+        self.stream.write('\r' + line + padding)
+        self.stream.flush()
+
+    def _rate(self, elapsed: float) -> float:
+        return self.processed / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,270 @@
+import csv
+import json
+import math
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from extractors.record import MetadataRecord, as_metadata_dict
+from output.console_writer import ConsoleWriter
+from utils import profiled
+
+
+BINARY_PREVIEW_BYTES = 64
+
+
+def to_serializable(value):
+    if isinstance(value, dict):
+        return {str(key): to_serializable(item) for key, item in value.items()}
+
+    if isinstance(value, (tuple, list)):
+        return [to_serializable(item) for item in value]
+
+    if isinstance(value, bytes):
+        text = value.rstrip(b'\x00')
+        if text and all(32 <= byte < 127 for byte in text):
+            return text.decode('ascii')
+        if len(value) > BINARY_PREVIEW_BYTES:
+            # maker notes and embedded thumbnails, as the text report shows them
+            return f"<binary data: {len(value)} bytes>"
+        return value.hex()
+
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+    return number if math.isfinite(number) else None
+
+
+def with_location(metadata: Optional[Dict[str, Any]], location: Optional[Dict[str, Any]]):
+    if metadata and location:
+        return {**metadata, 'location': location}
+    return metadata
+
+
+def export_metadata(metadata, location=None) -> Optional[Dict[str, Any]]:
+    # structured outputs get the raw byte count and integer dimensions
+    # rather than the display strings of the text report
+    if isinstance(metadata, MetadataRecord):
+        exported = dict(metadata.to_dict())
+        if 'basic_info' in exported:
+            basic = {key: value for key, value in exported['basic_info'].items() if key != 'dimensions'}
+            basic['file_size'] = metadata.file_size
+            exported['basic_info'] = basic
+        metadata = exported
+    return with_location(metadata, location)
+
+
+def json_record(file_path, metadata, error_message, duplicate_of=None, location=None) -> Dict[str, Any]:
+    record = {'path': str(file_path), 'error': error_message}
+    if duplicate_of is not None:
+        record['duplicate_of'] = str(duplicate_of)
+    metadata = export_metadata(metadata, location)
+    if metadata:
+        record.update(to_serializable(metadata))
+    return record
+
+
+class RecordWriter(ABC):
+
+    EXTENSION = ''
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        output_path,
+        batch_size: int = 100,
+        max_bytes: Optional[int] = None,
+        fsync_every: Optional[int] = None
+    ):
+        self.base_path = Path(output_path)
+        self.output_path = self.base_path
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.pending = 0
+        self.unsynced = 0
+        self.records = 0
+        self.rotations = 0
+        self.output_files = [self.output_path]
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = self._open()
+
+    @profiled('RecordWriter.write')
+    def write(
+        self,
+        file_path: Path,
+        metadata: Optional[Dict[str, Any]],
+        error_message: Optional[str] = None,
+        duplicate_of: Optional[Path] = None,
+        location: Optional[Dict[str, Any]] = None
+    ):
+        self._write_record(file_path, self._prepare(metadata, location), error_message, duplicate_of)
+        self.records += 1
+        self.pending += 1
+        self.unsynced += 1
+
+        if self.fsync_every and self.unsynced >= self.fsync_every:
+            self.sync()
+        elif self.pending >= self.batch_size:
+            self.flush()
+        else:
+            return
+
+        if self.max_bytes and self.handle.tell() >= self.max_bytes:
+            self._rotate()
+
+    def flush(self):
+        self.handle.flush()
+        self.pending = 0
+
+    def sync(self):
+        self.flush()
+        os.fsync(self.handle.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if self.handle.closed:
+            return
+        self.sync()
+        self.handle.close()
+
+    def _rotate(self):
+        self.close()
+        self.rotations += 1
+        self.output_path = self.base_path.with_name(
+            f"{self.base_path.stem}.{self.rotations}{self.base_path.suffix}"
+        )
+        self.output_files.append(self.output_path)
+        self.handle = self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open(self):
+        return open(self.output_path, 'a', encoding='utf-8', newline='', buffering=self.BUFFER_SIZE)
+
+    @staticmethod
+    def _prepare(metadata, location=None) -> Optional[Dict[str, Any]]:
+        return export_metadata(metadata, location)
+
+    @abstractmethod
+    def _write_record(
+        self,
+        file_path: Path,
+        metadata: Optional[Dict[str, Any]],
+        error_message: Optional[str],
+        duplicate_of: Optional[Path] = None
+    ):
+        pass
+
+
+class JsonLinesWriter(RecordWriter):
+
+    EXTENSION = '.jsonl'
+
+    def _write_record(self, file_path, metadata, error_message, duplicate_of=None):
+        record = json_record(file_path, metadata, error_message, duplicate_of)
+        self.handle.write(json.dumps(record, ensure_ascii=False))
+        self.handle.write('\n')
+
+
+class CsvWriter(RecordWriter):
+
+    EXTENSION = '.csv'
+
+    COLUMNS = [
+        'path', 'file_name', 'file_size', 'format', 'mode', 'width', 'height',
+        'make', 'model', 'lens_model', 'software',
+        'datetime_original', 'latitude', 'longitude', 'tag_count', 'error'
+    ]
+
+    def _open(self):
+        handle = super()._open()
+        self.csv_writer = csv.writer(handle, lineterminator='\n')
+        if handle.tell() == 0:
+            self._write_row(self.COLUMNS, handle)
+        return handle
+
+    def _write_record(self, file_path, metadata, error_message, duplicate_of=None):
+        self._write_row(self._row(file_path, metadata or {}, error_message), self.handle)
+
+    def _write_row(self, values, handle):
+        self.csv_writer.writerow(values)
+
+    def _row(self, file_path, metadata, error_message):
+        basic = metadata.get('basic_info', {})
+        camera = metadata.get('camera_info', {})
+        settings = metadata.get('settings_info', {})
+        lat, lon = metadata.get('gps_coords', (None, None))
+
+        tag_count = (
+            len(camera) + len(settings) + len(metadata.get('raw_exif', {}))
+            if metadata else None
+        )
+
+        values = [
+            str(file_path), basic.get('file_name'), basic.get('file_size'),
+            basic.get('format'), basic.get('mode'), basic.get('width'), basic.get('height'),
+            camera.get('Make'), camera.get('Model'), camera.get('LensModel'), camera.get('Software'),
+            settings.get('DateTimeOriginal'), lat, lon, tag_count, error_message
+        ]
+
+        return ['' if value is None else to_serializable(value) for value in values]
+
+
+class TsvWriter(CsvWriter):
+
+    EXTENSION = '.tsv'
+
+    def _write_row(self, values, handle):
+        handle.write('\t'.join(
+            str(value).replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
+            for value in values
+        ))
+        handle.write('\n')
+
+
+class TextWriter(RecordWriter):
+
+    EXTENSION = '.txt'
+
+    @staticmethod
+    def _prepare(metadata, location=None) -> Optional[Dict[str, Any]]:
+        return with_location(as_metadata_dict(metadata), location)
+
+    def _write_record(self, file_path, metadata, error_message, duplicate_of=None):
+        lines = ["#" * 70, f"File: {file_path}", "#" * 70]
+
+        if duplicate_of is not None:
+            lines.append(f"Duplicate of: {duplicate_of}")
+        elif error_message:
+            lines.append(error_message)
+        else:
+            lines.extend(ConsoleWriter.render_lines(metadata))
+
+        self.handle.write('\n'.join(lines))
+        self.handle.write('\n\n')
+
+
+WRITERS = {
+    'text': TextWriter,
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'tsv': TsvWriter
+}
+
+
+def create_writer(output_format: str, output_path, **options) -> RecordWriter:
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return WRITERS[output_format](output_path, **options)
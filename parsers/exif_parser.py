@@ -1,56 +1,151 @@
-class ExifParser:    
+import json
+
+from PIL.ExifTags import TAGS
+
+
+class ExifParser:
     CAMERA_TAGS = ['Make', 'Model', 'LensMake', 'LensModel', 'Software']
-    
+
     SETTINGS_TAGS = [
         'DateTime', 'DateTimeOriginal', 'DateTimeDigitized',
         'ExposureTime', 'FNumber', 'ISO', 'ISOSpeedRatings',
         'FocalLength', 'Flash', 'WhiteBalance', 'ExposureMode',
         'MeteringMode', 'ExposureProgram'
     ]
-    
+
+    CATEGORIES = ['camera', 'settings', 'other']
+
+    # tag name -> category, and tag ID -> (category, name, formatter);
+    # both are rebuilt by build_tag_table()
+    TAG_CATEGORIES = {}
+    TAG_TABLE = {}
+
+    FORMATTERS = {}
+
+    @classmethod
+    def build_tag_table(cls, category_map=None):
+        categories = {name: 'camera' for name in cls.CAMERA_TAGS}
+        categories.update({name: 'settings' for name in cls.SETTINGS_TAGS})
+
+        for name, category in (category_map or {}).items():
+            if category not in cls.CATEGORIES:
+                raise ValueError(f"Unknown tag category '{category}' for tag {name}")
+            categories[name] = category
+
+        cls.TAG_CATEGORIES = categories
+        cls.TAG_TABLE = {
+            tag_id: (
+                categories.get(name, 'other'),
+                name,
+                cls.FORMATTERS.get(name, cls._format_generic)
+            )
+            for tag_id, name in TAGS.items()
+        }
+
+    @classmethod
+    def load_category_map(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if not isinstance(data, dict):
+            raise ValueError(f"Tag category file must contain a JSON object: {path}")
+
+        category_map = {}
+        for category, names in data.items():
+            if not isinstance(names, list):
+                raise ValueError(f"Tag category '{category}' must map to a list of tag names")
+            for name in names:
+                category_map[name] = category
+
+        cls.build_tag_table(category_map)
+
+    @staticmethod
+    def classify_tags(tags):
+        camera_info = {}
+        settings_info = {}
+        other_tags = {}
+        routes = {'camera': camera_info, 'settings': settings_info, 'other': other_tags}
+        table = ExifParser.TAG_TABLE
+
+        for tag_id, value in tags.items():
+            entry = table.get(tag_id)
+            if entry is None:
+                other_tags[tag_id] = value
+            else:
+                routes[entry[0]][entry[1]] = value
+
+        return camera_info, settings_info, other_tags
+
     @staticmethod
     def categorize_tags(exif_dict):
         camera_info = {}
         settings_info = {}
         other_tags = {}
-        
+        routes = {'camera': camera_info, 'settings': settings_info, 'other': other_tags}
+        categories = ExifParser.TAG_CATEGORIES
+
         for key, value in exif_dict.items():
-            if key in ExifParser.CAMERA_TAGS:
-                camera_info[key] = value
-            elif key in ExifParser.SETTINGS_TAGS:
-                settings_info[key] = value
-            else:
-                other_tags[key] = value
-        
+            routes[categories.get(key, 'other')][key] = value
+
         return camera_info, settings_info, other_tags
-    
+
     @staticmethod
     def format_value(key, value):
-        if key == 'ExposureTime' and isinstance(value, tuple) and len(value) == 2:
+        formatter = ExifParser.FORMATTERS.get(key)
+        if formatter is not None:
+            formatted = formatter(value)
+            if formatted is not None:
+                return formatted
+
+        return ExifParser._format_generic(value)
+
+    @staticmethod
+    def format_tag(tag_id, value):
+        entry = ExifParser.TAG_TABLE.get(tag_id)
+        if entry is None:
+            return ExifParser._format_generic(value)
+
+        formatted = entry[2](value)
+        if formatted is None:
+            return ExifParser._format_generic(value)
+        return formatted
+
+    @staticmethod
+    def _format_exposure_time(value):
+        if isinstance(value, tuple) and len(value) == 2:
             return f"{value[0]}/{value[1]} sec"
-        
-        if key == 'FNumber' and isinstance(value, tuple) and len(value) == 2:
-            if value[1] != 0:
-                return f"f/{value[0]/value[1]:.1f}"
-        
-        if key == 'FocalLength' and isinstance(value, tuple) and len(value) == 2:
-            if value[1] != 0:
-                return f"{value[0]/value[1]:.1f} mm"
-        
+        return None
+
+    @staticmethod
+    def _format_f_number(value):
+        if isinstance(value, tuple) and len(value) == 2 and value[1] != 0:
+            return f"f/{value[0]/value[1]:.1f}"
+        return None
+
+    @staticmethod
+    def _format_focal_length(value):
+        if isinstance(value, tuple) and len(value) == 2 and value[1] != 0:
+            return f"{value[0]/value[1]:.1f} mm"
+        return None
+
+    @staticmethod
+    def _format_generic(value):
         if isinstance(value, bytes):
             try:
                 return value.decode('utf-8', errors='ignore')
             except:
                 return f"<binary data: {len(value)} bytes>"
-        
-        if isinstance(value, (tuple, list, dict)):
-            value_str = str(value)
-            if len(value_str) > 100:
-                return value_str[:97] + "..."
-            return value_str
-        
+
         value_str = str(value)
         if len(value_str) > 100:
             return value_str[:97] + "..."
-        
+
         return value_str
+
+
+ExifParser.FORMATTERS = {
+    'ExposureTime': ExifParser._format_exposure_time,
+    'FNumber': ExifParser._format_f_number,
+    'FocalLength': ExifParser._format_focal_length
+}
+ExifParser.build_tag_table()
@@ -1,3 +1,6 @@
+from utils import profiled
+
+
 class GPSParser:
     
     @staticmethod
@@ -17,6 +20,7 @@ class GPSParser:
         except (TypeError, ValueError, IndexError):
             return None
     
+    @profiled('GPSParser.parse')
     @staticmethod
     def parse(gps_data, gps_tags):
 
@@ -0,0 +1,41 @@
+import pytest
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+
+
+def build_exif(extra_exif_tags=None) -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = 'Canon'
+    exif[0x0110] = 'EOS 5D'
+    exif[0x0131] = 'GIMP'
+
+    exif_ifd = exif.get_ifd(EXIF_IFD)
+    exif_ifd[0x9003] = '2020:01:01 09:00:00'
+    exif_ifd[0x829A] = IFDRational(1, 250)
+    exif_ifd[0x829D] = IFDRational(28, 10)
+    exif_ifd[0x8827] = 400
+    exif_ifd.update(extra_exif_tags or {})
+
+    gps_ifd = exif.get_ifd(GPS_IFD)
+    gps_ifd[1] = 'N'
+    gps_ifd[2] = (IFDRational(40), IFDRational(26), IFDRational(4614, 100))
+    gps_ifd[3] = 'W'
+    gps_ifd[4] = (IFDRational(79), IFDRational(58), IFDRational(5600, 100))
+
+    return exif
+
+
+@pytest.fixture
+def make_image(tmp_path):
+    def make(name, image_format='JPEG', size=(40, 30), mode='RGB', exif=True, extra_exif_tags=None):
+        path = tmp_path / name
+        image = Image.new(mode, size, 'red')
+        options = {'exif': build_exif(extra_exif_tags)} if exif else {}
+        image.save(path, image_format, **options)
+        return path
+
+    return make
@@ -0,0 +1,106 @@
+import json
+import os
+import pickle
+import shutil
+
+import pytest
+
+from core.cache import MetadataCache
+from core.exif_service import ExifService
+from utils import hash_file
+
+
+@pytest.fixture
+def photo(make_image):
+    return make_image('photo.jpg')
+
+
+@pytest.fixture
+def record(photo):
+    return ExifService().extract_record(photo)
+
+
+def open_cache(tmp_path, **options):
+    return MetadataCache(str(tmp_path / 'cache.db'), **options)
+
+
+def rows(cache):
+    return cache.connection.execute("SELECT path, metadata FROM entries").fetchall()
+
+
+def test_miss_then_hit(tmp_path, photo, record):
+    cache = open_cache(tmp_path)
+
+    assert cache.get(photo) == (None, None)
+    cache.put(photo, record)
+    cached, digest = cache.get(photo)
+
+    assert cached == record
+    assert digest is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_entries_survive_reopening_as_json(tmp_path, photo, record):
+    cache = open_cache(tmp_path)
+    cache.put(photo, record)
+    cache.close()
+
+    cache = open_cache(tmp_path)
+    [(_, metadata)] = rows(cache)
+    json.loads(metadata)
+    assert cache.get(photo)[0] == record
+    cache.close()
+
+
+def test_modified_file_misses(tmp_path, photo, record):
+    cache = open_cache(tmp_path)
+    cache.put(photo, record)
+
+    stat = os.stat(photo)
+    os.utime(photo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert cache.get(photo) == (None, None)
+    assert cache.misses == 1
+    cache.close()
+
+
+def test_hash_mode_hit_for_renamed_copy(tmp_path, photo, record):
+    cache = open_cache(tmp_path, hash_mode=True)
+    cache.put(photo, record)
+
+    copy = tmp_path / 'copy_of_photo.jpg'
+    shutil.copyfile(photo, copy)
+    cached, digest = cache.get(copy)
+
+    assert cached.file_name == 'copy_of_photo.jpg'
+    assert cached.tags == record.tags
+    assert digest == hash_file(copy)
+    assert cache.hits == 1
+    cache.close()
+
+
+def test_hash_mode_miss_hands_back_digest(tmp_path, photo):
+    cache = open_cache(tmp_path, hash_mode=True)
+    assert cache.get(photo) == (None, hash_file(photo))
+    cache.close()
+
+
+@pytest.mark.parametrize('stored', [
+    '{"$m": {"file_name": "photo.jpg", "file_si',
+    pickle.dumps({'basic_info': {}}),
+    '{"$m": {"no_such_field": 1}}',
+])
+def test_undecodable_entry_is_a_miss_and_replaced(tmp_path, photo, record, stored):
+    cache = open_cache(tmp_path)
+    cache.put(photo, record)
+    cache.connection.execute("UPDATE entries SET metadata = ?", (stored,))
+
+    assert cache.get(photo) == (None, None)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert rows(cache) == []
+    assert cache.total_bytes == 0
+
+    cache.put(photo, record)
+    assert cache.get(photo)[0] == record
+    cache.close()
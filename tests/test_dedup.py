@@ -0,0 +1,99 @@
+import os
+
+from core.dedup import DuplicateIndex
+from utils import hash_file
+
+
+BLOCK_SIZE = 1024
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return path
+
+
+def test_groups_identical_small_files(tmp_path):
+    data = os.urandom(BLOCK_SIZE)
+    first = write(tmp_path / 'first.jpg', data)
+    copy = write(tmp_path / 'copy.jpg', data)
+    other = write(tmp_path / 'other.jpg', os.urandom(BLOCK_SIZE))
+
+    index = DuplicateIndex(block_size=BLOCK_SIZE)
+
+    assert index.check(first) == (None, None)
+    assert index.check(other) == (None, None)
+    assert index.check(copy) == (first, None)
+    assert index.duplicates == 1
+
+
+def test_full_hash_tells_apart_files_with_equal_head_and_tail(tmp_path):
+    data = os.urandom(10 * BLOCK_SIZE)
+    changed = bytearray(data)
+    changed[5 * BLOCK_SIZE] ^= 0xFF
+
+    first = write(tmp_path / 'first.jpg', data)
+    near = write(tmp_path / 'near.jpg', bytes(changed))
+    copy = write(tmp_path / 'copy.jpg', data)
+
+    index = DuplicateIndex(block_size=BLOCK_SIZE)
+
+    assert index.check(first) == (None, None)
+    assert index.check(near) == (None, hash_file(near))
+    assert index.check(copy) == (first, hash_file(copy))
+    assert index.full_hashes == 3
+
+
+def test_each_file_is_hashed_once(tmp_path):
+    data = os.urandom(10 * BLOCK_SIZE)
+    files = [write(tmp_path / f"{i}.jpg", data) for i in range(4)]
+    index = DuplicateIndex(block_size=BLOCK_SIZE)
+
+    first_pass = [index.check(file_path)[0] for file_path in files]
+    hashes = (index.partial_hashes, index.full_hashes)
+    second_pass = [index.check(file_path)[0] for file_path in files]
+
+    assert first_pass == [None] + [files[0]] * 3
+    assert second_pass == first_pass
+    assert hashes == (4, 4)
+    assert (index.partial_hashes, index.full_hashes) == hashes
+
+
+def test_rewritten_file_is_checked_again(tmp_path):
+    data = os.urandom(BLOCK_SIZE)
+    first = write(tmp_path / 'first.jpg', data)
+    copy = write(tmp_path / 'copy.jpg', data)
+
+    index = DuplicateIndex(block_size=BLOCK_SIZE)
+    index.check(first)
+    index.remember(first, ('metadata', None))
+    assert index.check(copy)[0] == first
+
+    write(first, os.urandom(BLOCK_SIZE))
+    stat = os.stat(first)
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert index.check(first) == (None, None)
+    assert index.result(first) is None
+    assert index.check(copy) == (None, None)
+
+
+def test_tables_stay_bounded(tmp_path):
+    data = os.urandom(4 * BLOCK_SIZE)
+    files = [write(tmp_path / f"{i}.jpg", data) for i in range(10)]
+    files += [write(tmp_path / f"unique_{i}.jpg", os.urandom(4 * BLOCK_SIZE)) for i in range(10)]
+
+    index = DuplicateIndex(block_size=BLOCK_SIZE, max_files=3)
+    for file_path in files:
+        index.check(file_path)
+        index.remember(file_path, ('metadata', None))
+
+    live = set(index.files)
+    assert len(live) == 3
+    assert set(index.results) <= live
+    assert all(path is None or path in live for path in index.sizes.values())
+    assert all(path in live for group in index.partials.values() for path in group)
+    assert all(path in live for group in index.fulls.values() for path in group)
+
+    # copies of evicted files are new again, copies of live ones are still found
+    assert index.check(write(tmp_path / 'late.jpg', data))[0] is None
+    assert index.check(write(tmp_path / 'late_copy.jpg', data))[0] == tmp_path / 'late.jpg'
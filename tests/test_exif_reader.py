@@ -0,0 +1,55 @@
+import pytest
+from PIL import Image
+
+from core.exif_service import extract_file
+from extractors import ExifReader, ImageExtractor
+
+
+@pytest.mark.parametrize('name, image_format', [('photo.jpg', 'JPEG'), ('photo.png', 'PNG')])
+def test_matches_pillow_getexif(make_image, name, image_format):
+    path = make_image(name, image_format)
+
+    reader = ExifReader(path)
+    assert reader.read()
+
+    with Image.open(path) as image:
+        assert reader.exif_data == image._getexif()
+        assert (reader.format, reader.mode, reader.width, reader.height) == (
+            image.format, image.mode, image.width, image.height
+        )
+
+
+def test_tiff_matches_pillow_merged_exif(make_image):
+    path = make_image('photo.tiff', 'TIFF')
+
+    reader = ExifReader(path)
+    assert reader.read()
+
+    with Image.open(path) as image:
+        assert reader.exif_data == ImageExtractor._merged_exif(image.getexif())
+
+
+def test_image_without_exif(make_image):
+    reader = ExifReader(make_image('plain.jpg', exif=False))
+    assert reader.read()
+    assert reader.exif_data is None
+
+
+@pytest.mark.parametrize('name, image_format, mode', [
+    ('photo.gif', 'GIF', 'RGB'),
+    ('photo.bmp', 'BMP', 'RGB'),
+    ('photo.webp', 'WEBP', 'RGB'),
+    ('float.tif', 'TIFF', 'F'),
+])
+def test_pillow_fallback_formats(make_image, name, image_format, mode):
+    # formats ExifReader does not decode go through Image.getexif()
+    path = make_image(name, image_format, mode=mode, exif=image_format in ('WEBP', 'TIFF'))
+
+    metadata, error_message = extract_file(path, True)
+
+    assert error_message is None
+    assert metadata.format == image_format
+    assert (metadata.width, metadata.height) == (40, 30)
+    if image_format == 'WEBP':
+        assert metadata.get_tag('Make') == 'Canon'
+        assert metadata.latitude == pytest.approx(40 + 26 / 60 + 46.14 / 3600)
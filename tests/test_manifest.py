@@ -0,0 +1,58 @@
+import os
+
+from core.manifest import RunManifest
+
+
+def run(manifest_path, scanned, failed=()):
+    manifest = RunManifest(manifest_path)
+    changed = [file_path for file_path in scanned if manifest.check(file_path)]
+    for file_path in changed:
+        manifest.record(file_path, None, failed=file_path in failed)
+    return manifest, changed
+
+
+def test_deleted_reports_only_files_that_are_gone(tmp_path):
+    kept, removed, excluded = (tmp_path / name for name in ('kept.jpg', 'removed.jpg', 'excluded.jpg'))
+    for file_path in (kept, removed, excluded):
+        file_path.write_bytes(b'data')
+    manifest_path = tmp_path / 'manifest.json'
+
+    first, changed = run(manifest_path, [kept, removed, excluded])
+    first.save()
+    assert changed == [kept, removed, excluded]
+
+    removed.unlink()
+    # excluded still exists but is left out of this scan, e.g. by --exclude
+    second, changed = run(manifest_path, [kept])
+    assert changed == []
+    assert second.unchanged == 1
+    assert second.deleted() == [os.path.abspath(removed)]
+    second.save()
+
+    third, changed = run(manifest_path, [kept, excluded])
+    assert changed == []
+    assert third.deleted() == []
+
+
+def test_modified_files_are_processed_again(tmp_path):
+    photo = tmp_path / 'photo.jpg'
+    photo.write_bytes(b'data')
+    manifest_path = tmp_path / 'manifest.json'
+
+    run(manifest_path, [photo])[0].save()
+    photo.write_bytes(b'longer data')
+
+    assert run(manifest_path, [photo])[1] == [photo]
+
+
+def test_failed_files_are_retried(tmp_path):
+    good, bad = tmp_path / 'good.jpg', tmp_path / 'bad.jpg'
+    good.write_bytes(b'data')
+    bad.write_bytes(b'corrupt')
+    manifest_path = tmp_path / 'manifest.json'
+
+    run(manifest_path, [good, bad], failed=[bad])[0].save()
+
+    manifest, changed = run(manifest_path, [good, bad])
+    assert changed == [bad]
+    assert manifest.deleted() == []
@@ -0,0 +1,30 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from core.reader import FileReader
+
+
+@pytest.mark.parametrize('poll_interval', [
+    0.01,
+    pytest.param(None, marks=pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify')),
+])
+def test_files_created_during_the_scan_are_handed_out_once(tmp_path, poll_interval):
+    (tmp_path / 'before.jpg').write_bytes(b'before')
+
+    watcher = FileReader.watch_supported_files(str(tmp_path), settle=0, poll_interval=poll_interval)
+    watcher.start()
+    try:
+        # lands after the watch was armed, so both the scan and the watch see it
+        (tmp_path / 'during.jpg').write_bytes(b'during')
+        scanned = list(watcher.track(FileReader.iter_supported_files(str(tmp_path))))
+        (tmp_path / 'after.jpg').write_bytes(b'after')
+
+        batch = next(watcher.batches())
+    finally:
+        watcher.close()
+
+    assert sorted(file_path.name for file_path in scanned) == ['before.jpg', 'during.jpg']
+    assert batch == [Path(os.path.abspath(tmp_path / 'after.jpg'))]
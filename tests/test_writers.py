@@ -0,0 +1,83 @@
+import csv
+import json
+
+import pytest
+
+from core.exif_service import ExifService
+from output.writers import CsvWriter, JsonLinesWriter, TextWriter, TsvWriter
+from utils import format_file_size
+
+
+MAKER_NOTE = 0x927C
+
+
+@pytest.fixture
+def photo(make_image):
+    return make_image('photo.jpg', size=(40, 30), extra_exif_tags={MAKER_NOTE: bytes(range(256)) * 16})
+
+
+@pytest.fixture
+def record(photo):
+    return ExifService().extract_record(photo)
+
+
+@pytest.mark.parametrize('writer_class, delimiter', [(CsvWriter, ','), (TsvWriter, '\t')])
+def test_csv_columns(tmp_path, photo, record, writer_class, delimiter):
+    output_path = tmp_path / f"out{writer_class.EXTENSION}"
+    with writer_class(output_path) as writer:
+        writer.write(photo, record)
+        writer.write(tmp_path / 'bad.jpg', None, 'Invalid or corrupted image')
+
+    with open(output_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f, delimiter=delimiter))
+
+    assert list(rows[0]) == CsvWriter.COLUMNS
+    assert rows[0]['path'] == str(photo)
+    assert rows[0]['file_size'] == str(photo.stat().st_size)
+    assert (rows[0]['width'], rows[0]['height']) == ('40', '30')
+    assert (rows[0]['make'], rows[0]['model'], rows[0]['software']) == ('Canon', 'EOS 5D', 'GIMP')
+    assert rows[0]['datetime_original'] == '2020:01:01 09:00:00'
+    assert float(rows[0]['latitude']) == pytest.approx(record.latitude)
+    assert float(rows[0]['longitude']) == pytest.approx(record.longitude)
+    assert rows[0]['error'] == ''
+
+    assert rows[1]['path'] == str(tmp_path / 'bad.jpg')
+    assert rows[1]['file_size'] == ''
+    assert rows[1]['error'] == 'Invalid or corrupted image'
+
+
+def test_jsonl_record(tmp_path, photo, record):
+    output_path = tmp_path / 'out.jsonl'
+    location = {'place': 'Pittsburgh', 'country': 'US', 'distance_km': 1.5}
+    with JsonLinesWriter(output_path) as writer:
+        writer.write(photo, record, location=location)
+        writer.write(photo, record, duplicate_of=tmp_path / 'original.jpg')
+
+    with open(output_path, encoding='utf-8') as f:
+        first, duplicate = [json.loads(line) for line in f]
+
+    assert first['path'] == str(photo)
+    assert first['error'] is None
+    assert first['basic_info'] == {
+        'file_name': 'photo.jpg',
+        'file_size': photo.stat().st_size,
+        'format': 'JPEG',
+        'mode': 'RGB',
+        'width': 40,
+        'height': 30
+    }
+    assert first['camera_info']['Make'] == 'Canon'
+    assert first['raw_exif']['MakerNote'] == '<binary data: 4096 bytes>'
+    assert first['gps_coords'] == pytest.approx([record.latitude, record.longitude])
+    assert first['location'] == location
+    assert duplicate['duplicate_of'] == str(tmp_path / 'original.jpg')
+
+
+def test_text_report_keeps_display_values(tmp_path, photo, record):
+    output_path = tmp_path / 'out.txt'
+    with TextWriter(output_path) as writer:
+        writer.write(photo, record)
+
+    text = output_path.read_text(encoding='utf-8')
+    assert f"File Size                      : {format_file_size(photo.stat().st_size)}" in text
+    assert "Dimensions                     : 40 x 30" in text
@@ -1,3 +1,4 @@
-from .helpers import format_file_size, escape_html, format_pdf_date
+from .helpers import format_file_size, escape_html, format_pdf_date, hash_file
+from .profiler import Profiler, profiled, collect_profile
 
-__all__ = ['format_file_size', 'escape_html', 'format_pdf_date']
+__all__ = ['format_file_size', 'escape_html', 'format_pdf_date', 'hash_file', 'Profiler', 'profiled', 'collect_profile']
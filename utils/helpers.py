@@ -1,3 +1,6 @@
+import hashlib
+
+
 def format_file_size(bytes_size):
 
     if bytes_size == 0:
@@ -49,3 +52,17 @@ def format_pdf_date(date_string):
             return date_string
     
     return date_string
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+
+    # content digest shared by the cache, the index and duplicate detection
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+    except OSError:
+        return None
+    
+    return digest.hexdigest()
@@ -0,0 +1,221 @@
+import heapq
+import json
+import math
+import time
+from functools import wraps
+from typing import Dict, Any, List
+
+
+class StageStats:
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    # histogram buckets are quarter powers of two of a microsecond, so
+    # percentiles are accurate to within ~19% without keeping samples
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+        micros = seconds * 1e6
+        bucket = int(math.log2(micros) * self.BUCKETS_PER_OCTAVE) if micros > 1 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other: 'StageStats'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+
+        target = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                upper = 2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_sec': self.total,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class Profiler:
+
+    enabled = False
+    stages: Dict[str, StageStats] = {}
+    slowest: List[tuple] = []
+    slowest_count = 10
+
+    @classmethod
+    def enable(cls, slowest_count: int = 10):
+        if not cls.enabled:
+            profiled.install(True)
+        cls.enabled = True
+        cls.slowest_count = slowest_count
+
+    @classmethod
+    def disable(cls):
+        if cls.enabled:
+            profiled.install(False)
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls):
+        cls.stages = {}
+        cls.slowest = []
+
+    @classmethod
+    def record(cls, stage: str, seconds: float):
+        stats = cls.stages.get(stage)
+        if stats is None:
+            stats = cls.stages[stage] = StageStats()
+        stats.add(seconds)
+
+    @classmethod
+    def record_file(cls, path, seconds: float):
+        entry = (seconds, str(path))
+        if len(cls.slowest) < cls.slowest_count:
+            heapq.heappush(cls.slowest, entry)
+        elif entry > cls.slowest[0]:
+            heapq.heapreplace(cls.slowest, entry)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        return {'stages': cls.stages, 'slowest': cls.slowest}
+
+    @classmethod
+    def merge(cls, snapshot: Dict[str, Any]):
+        for stage, stats in snapshot['stages'].items():
+            if stage in cls.stages:
+                cls.stages[stage].merge(stats)
+            else:
+                cls.stages[stage] = stats
+        for seconds, path in snapshot['slowest']:
+            cls.record_file(path, seconds)
+
+    @classmethod
+    def report(cls) -> Dict[str, Any]:
+        return {
+            'stages': {stage: stats.to_dict() for stage, stats in cls.stages.items()},
+            'slowest_files': [
+                {'file': path, 'ms': seconds * 1000}
+                for seconds, path in sorted(cls.slowest, reverse=True)
+            ]
+        }
+
+    @classmethod
+    def print_summary(cls):
+        report = cls.report()
+
+        print("\n" + "=" * 70)
+        print("PROFILE")
+        print("=" * 70)
+        print(f"{'Stage':32} {'calls':>8} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+
+        stages = sorted(report['stages'].items(), key=lambda item: item[1]['total_sec'], reverse=True)
+        for stage, stats in stages:
+            print(
+                f"{stage:32} {stats['count']:8} {stats['total_sec']:9.3f} "
+                f"{stats['mean_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['max_ms']:9.3f}"
+            )
+
+        if report['slowest_files']:
+            print(f"\nSlowest {len(report['slowest_files'])} files:")
+            for entry in report['slowest_files']:
+                print(f"  {entry['ms']:9.3f} ms  {entry['file']}")
+
+    @classmethod
+    def dump_json(cls, output_path):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(cls.report(), f, indent=2)
+
+
+class profiled:
+
+    # Decorated methods stay the plain function on their class while profiling
+    # is off, so disabled instrumentation costs nothing per call;
+    # Profiler.enable() swaps in timed wrappers.
+    registry: List[tuple] = []
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.func = None
+
+    def __call__(self, *args, **kwargs):
+        if self.func is None:
+            self.func = args[0]
+            return self
+
+        if not Profiler.enabled:
+            return self.func(*args, **kwargs)
+        return self.timed(self.func)(*args, **kwargs)
+
+    def __set_name__(self, owner, name):
+        setattr(owner, name, self.func)
+        profiled.register(owner, name, self.stage)
+
+    @classmethod
+    def register(cls, owner, name, stage):
+        # for classes rebuilt after their body runs (dataclass slots=True),
+        # register the final class explicitly instead of decorating
+        func = owner.__dict__[name]
+        cls.registry.append((owner, name, func, stage))
+        if Profiler.enabled:
+            setattr(owner, name, cls.wrap(func, stage))
+
+    @staticmethod
+    def wrap(func, stage):
+        if isinstance(func, staticmethod):
+            return staticmethod(profiled.timed_stage(func.__func__, stage))
+        return profiled.timed_stage(func, stage)
+
+    def timed(self, func):
+        return profiled.timed_stage(func, self.stage)
+
+    @staticmethod
+    def timed_stage(func, stage):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                Profiler.record(stage, time.perf_counter() - started)
+        return wrapper
+
+    @classmethod
+    def install(cls, enabled: bool):
+        for owner, name, func, stage in cls.registry:
+            setattr(owner, name, cls.wrap(func, stage) if enabled else func)
+
+
+def collect_profile(func, *args):
+    Profiler.enable()
+    Profiler.reset()
+
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+
+    return result, elapsed, Profiler.snapshot()